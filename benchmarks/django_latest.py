@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Latest version of each package, in Python and in SQL.
+
+A table of releases (package, VersionField(sortable=True)) is filled, then
+the latest version of every package is computed:
+
+- in Python, from all the rows;
+- with ``MaxVersion`` grouped by package;
+- with a window over ``VersionKey``;
+
+and the latest version of a single package is looked up through the
+(package, version_key) index. Needs Django.
+
+Run with::
+
+    python -m benchmarks.django_latest --rows 1000000 [--postgres DBNAME]
+
+PostgreSQL connection settings are taken from the PG* environment variables.
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import time
+
+import django
+from django.conf import settings
+
+
+def setup(postgres):
+    if postgres:
+        database = {'ENGINE': 'django.db.backends.postgresql', 'NAME': postgres}
+    else:
+        database = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+    settings.configure(DATABASES={'default': database})
+    django.setup()
+
+    from django.db import connection
+    from django.db import models
+    from semantic_version import django_fields
+
+    class Release(models.Model):
+        package = models.CharField(max_length=50)
+        version = django_fields.VersionField(sortable=True)
+
+        class Meta:
+            app_label = 'benchmarks'
+            index_together = [('package', 'version_key')]
+
+    with connection.schema_editor() as editor:
+        editor.create_model(Release)
+    return Release
+
+
+def fill(Release, rows, packages, seed):
+    rng = random.Random(seed)
+    batch = []
+    for i in range(rows):
+        version = '%d.%d.%d' % (rng.randrange(5), rng.randrange(20), rng.randrange(20))
+        if rng.random() < 0.1:
+            version += '-rc.%d' % rng.randrange(5)
+        batch.append(Release(package='pkg-%d' % (i % packages), version=version))
+        if len(batch) == 10000:
+            Release.objects.bulk_create(batch)
+            batch = []
+    Release.objects.bulk_create(batch)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print("%-34s %8.3fs" % (label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--packages', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--postgres', metavar='DBNAME',
+                        help="use this PostgreSQL database instead of SQLite")
+    args = parser.parse_args()
+
+    Release = setup(args.postgres)
+    from django.db.models import F, Window
+    from django.db.models.functions import FirstValue
+    from semantic_version.django_fields import MaxVersion, VersionKey
+
+    timed("insert %d rows" % args.rows, lambda: fill(Release, args.rows, args.packages, args.seed))
+
+    def in_python():
+        latest = {}
+        for (package, version) in Release.objects.values_list('package', 'version').iterator():
+            if package not in latest or version > latest[package]:
+                latest[package] = version
+        return latest
+
+    def max_version():
+        return {
+            row['package']: row['latest']
+            for row in Release.objects.values('package').annotate(latest=MaxVersion('version'))
+        }
+
+    def window():
+        return dict(
+            Release.objects.annotate(latest=Window(
+                FirstValue('version'),
+                partition_by=F('package'),
+                order_by=VersionKey('version').desc(),
+            )).values_list('package', 'latest').distinct()
+        )
+
+    def single():
+        return [
+            Release.objects.filter(package='pkg-%d' % i)
+            .order_by(VersionKey('version').desc())
+            .values_list('version', flat=True)[0]
+            for i in range(100)
+        ]
+
+    expected = timed("latest per package, in Python", in_python)
+    assert timed("latest per package, MaxVersion", max_version) == expected
+    assert timed("latest per package, window", window) == expected
+    assert timed("latest of 100 packages, index", single) == [
+        expected['pkg-%d' % i] for i in range(100)
+    ]
+
+
+if __name__ == '__main__':
+    main()
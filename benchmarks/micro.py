@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Micro benchmarks of the hot paths, with a baseline to catch regressions.
+
+Each benchmark runs over a corpus drawn from a seeded, satisfiable
+`registry`. A pass takes the best time per item over a few timeit runs;
+the result is the median over several passes, which are interleaved so
+that a slow period of the machine doesn't hit a single benchmark, and
+with ``--processes``, the median over several interpreters.
+
+Run with::
+
+    python -m benchmarks.micro [--only parse sort ...]
+    python -m benchmarks.micro --processes 5 --save benchmarks/baseline.json
+    python -m benchmarks.micro --processes 3 --compare benchmarks/baseline.json [--threshold 0.4]
+
+With ``--compare``, the exit status is 1 when a benchmark got slower than
+the baseline by more than the threshold. Between ``make bench`` runs on the
+same (shared) machine, results moved by up to 22%: the default threshold
+is 40%. Timings depend on the machine: refresh the baseline
+(``make bench-baseline``) before comparing on another one. ``to_python``
+is skipped when Django isn't installed.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import random
+import subprocess
+import sys
+import timeit
+
+from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_server
+
+from . import registry
+
+
+Corpus = collections.namedtuple('Corpus', [
+    'strings', 'messy', 'versions', 'reqs', 'specs', 'pkgsVersionsSpecs', 'pkgsVersionsDeps', 'root',
+])
+
+
+def corpus(size=300, seed=0):
+    """Versions and specs as found in a registry of size pkgs."""
+    rng = random.Random(seed)
+    (pkgsVersionsSpecs, pkgsYanked, root) = registry.generate(size, seed=seed, conflictRate=0)
+
+    versions = []
+    specs = []
+    for pkgVersionsSpecs in pkgsVersionsSpecs.values():
+        for (version, depsSpecs) in pkgVersionsSpecs.items():
+            versions.append(version)
+            for depSpecs in depsSpecs.values():
+                specs.extend(depSpecs)
+            # Some pre-releases and builds, as published before releases.
+            if rng.random() < 0.2:
+                versions.append(base.Version(
+                    version.major, version.minor, version.patch,
+                    prerelease=(rng.choice(('alpha', 'beta', 'rc')), str(rng.randrange(1, 12))),
+                ))
+            if rng.random() < 0.05:
+                versions.append(base.Version(
+                    version.major, version.minor, version.patch, build=('build', str(rng.randrange(100))),
+                ))
+    rng.shuffle(versions)
+
+    strings = [str(version) for version in versions]
+    messy = []
+    for version in versions:
+        variant = rng.random()
+        if variant < 0.3:
+            messy.append('%d.%d' % (version.major, version.minor))
+        elif variant < 0.6:
+            messy.append('%s.%d' % (version, rng.randrange(10)))
+        else:
+            messy.append('%s+build_%d' % (version, rng.randrange(100)))
+
+    server = edge_server.EdgeServer(pkgsVersionsSpecs, pkgsYanked)
+    discovery = edge.EdgeDiscovery(server.retrieve)
+    discovery.update({root: pkgsVersionsSpecs[root]})
+    discovery.run()
+
+    return Corpus(
+        strings=strings,
+        messy=messy,
+        versions=versions,
+        reqs=[req for spec in specs for req in spec.requirements],
+        specs=specs,
+        pkgsVersionsSpecs=pkgsVersionsSpecs,
+        pkgsVersionsDeps=discovery.pkgs_versions_deps(root),
+        root=root,
+    )
+
+
+def bench_parse(c):
+    parse = base.Version.parse
+    strings = c.strings
+    return (lambda: [parse(s) for s in strings], len(strings))
+
+
+def bench_coerce(c):
+    coerce = base.Version.coerce
+    messy = c.messy
+    return (lambda: [coerce(s) for s in messy], len(messy))
+
+
+def bench_compare(c):
+    pairs = list(zip(c.versions, c.versions[1:]))
+    return (lambda: [a < b for (a, b) in pairs], len(pairs))
+
+
+def bench_sort(c):
+    versions = c.versions
+    return (lambda: sorted(versions), len(versions))
+
+
+def bench_match(c):
+    reqs = c.reqs[:200]
+    versions = c.versions[:200]
+    return (lambda: [req.match(v) for req in reqs for v in versions], len(reqs) * len(versions))
+
+
+def bench_filter(c):
+    specs = c.specs[:100]
+    versions = c.versions[:200]
+    return (lambda: [list(spec.filter(versions)) for spec in specs], len(specs) * len(versions))
+
+
+def bench_select(c):
+    specs = c.specs[:100]
+    versions = c.versions[:200]
+    return (lambda: [spec.select(versions) for spec in specs], len(specs) * len(versions))
+
+
+def bench_edges_append(c):
+    pkgsSpecs = collections.defaultdict(list)
+    for pkgVersionsSpecs in c.pkgsVersionsSpecs.values():
+        for depsSpecs in pkgVersionsSpecs.values():
+            for (dep, depSpecs) in depsSpecs.items():
+                pkgsSpecs[dep].extend(depSpecs)
+    specsLists = list(pkgsSpecs.values())
+
+    def run():
+        for specs in specsLists:
+            edges = edge.Edges()
+            for spec in specs:
+                edges.append(spec)
+
+    return (run, sum(len(specs) for specs in specsLists))
+
+
+def bench_solve(c):
+    pkgsVersionsDeps = c.pkgsVersionsDeps
+    root = c.root
+
+    # Raises NotSolved if the corpus isn't satisfiable anymore: the failure
+    # path isn't what this measures.
+    edge.solve(pkgsVersionsDeps, root)
+    return (lambda: edge.solve(pkgsVersionsDeps, root), len(pkgsVersionsDeps))
+
+
+def bench_to_python(c):
+    try:
+        from semantic_version import django_fields
+    except ImportError:
+        return None
+    to_python = django_fields.VersionField().to_python
+    # Distinct strings and an empty memo: this measures parsing, not hits.
+    strings = sorted(set(c.strings))
+
+    def run():
+        base._parse_memo.clear()
+        return [to_python(s) for s in strings]
+
+    return (run, len(strings))
+
+
+BENCHMARKS = collections.OrderedDict([
+    ('parse', bench_parse),
+    ('coerce', bench_coerce),
+    ('compare', bench_compare),
+    ('sort', bench_sort),
+    ('match', bench_match),
+    ('filter', bench_filter),
+    ('select', bench_select),
+    ('edges_append', bench_edges_append),
+    ('solve', bench_solve),
+    ('to_python', bench_to_python),
+])
+
+
+def run(names, c, runs=5, repeat=3):
+    """Return ``name -> seconds per item`` for the benchmarks names.
+
+    That's the median over runs passes of the best of repeat timings.
+    """
+    timers = collections.OrderedDict()
+    for name in names:
+        benchmark = BENCHMARKS[name](c)
+        if benchmark is None:
+            continue
+        (func, items) = benchmark
+        timer = timeit.Timer(func)
+        (number, _elapsed) = timer.autorange()
+        timers[name] = (timer, number, items)
+
+    timings = collections.defaultdict(list)
+    for _run in range(runs):
+        for (name, (timer, number, items)) in timers.items():
+            timings[name].append(min(timer.repeat(repeat, number)) / number / items)
+
+    return collections.OrderedDict(
+        (name, sorted(timings[name])[runs // 2]) for name in timers
+    )
+
+
+def run_processes(processes, argv):
+    """Run the benchmarks in processes new interpreters, with the options in
+    argv; return the median of each result.
+
+    Timings vary more between processes (memory layout, hash seeds...) than
+    between the passes of one process.
+    """
+    resultsList = []
+    for _process in range(processes):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.micro', '--json'] + argv)
+        resultsList.append(json.loads(output.decode('utf-8')))
+    return collections.OrderedDict(
+        (name, sorted(results[name] for results in resultsList)[processes // 2])
+        for name in resultsList[0]
+    )
+
+
+def compare(results, baseline, threshold):
+    """Print results against baseline; return the names which regressed."""
+    regressions = []
+    print("%-14s %12s %12s %8s" % ("benchmark", "time", "baseline", "change"))
+    for (name, seconds) in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print("%-14s %10.3fus %12s" % (name, seconds * 1e6, "-"))
+            continue
+        change = seconds / reference - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print("%-14s %10.3fus %10.3fus %+7.1f%%%s" % (
+            name, seconds * 1e6, reference * 1e6, change * 100, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--size', type=int, default=300, help="pkgs in the registry")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=1,
+                        help="run in new interpreters, and take the median (default: %(default)s)")
+    parser.add_argument('--runs', type=int, default=3,
+                        help="passes to take the median of (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="timings to take the best of, in a pass (default: %(default)s)")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare with a baseline")
+    parser.add_argument('--threshold', type=float, default=0.4,
+                        help="slowdown flagged as a regression (default: %(default)s)")
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        results = run_processes(args.processes, [
+            '--only'] + args.only + [
+            '--size', str(args.size),
+            '--seed', str(args.seed),
+            '--runs', str(args.runs),
+            '--repeat', str(args.repeat),
+        ])
+    else:
+        results = run(args.only, corpus(args.size, args.seed), runs=args.runs, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if regressions:
+        print("Slower than the baseline by more than %d%%: %s" % (
+            args.threshold * 100, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""A seeded generator of synthetic registries.
+
+The registries try to look like real ones:
+
+- pkgs are spread over layers and only depend on pkgs of lower layers, so
+  that dependency chains have a realistic depth;
+- the number of versions per pkg and the number of dependencies per version
+  follow power laws, and a few popular pkgs get most of the dependents;
+- versions are a history of patch, minor and major releases;
+- specs are a mix of caret, tilde, ranges and exact versions;
+- some versions are yanked;
+- some diamonds conflict on their latest versions, which forces the
+  solver to backtrack.
+
+The specs of the latest version of each pkg allow the latest versions of
+its deps, which are never yanked: without conflicting diamonds, locking
+every pkg to its latest version is a solution.
+"""
+
+import random
+
+from semantic_version import base
+
+
+def generate(pkgs, seed=0, layers=8, maxVersions=30, maxDeps=12,
+             yankRate=0.05, conflictRate=0.01):
+    """Return ``(pkgsVersionsSpecs, pkgsYanked, root)`` for a registry of pkgs.
+
+    The registry is ``pkg -> {version: {dep: [Spec]}}`` and root is a pkg
+    which (transitively) depends on a large part of it.
+    """
+    rng = random.Random(seed)
+    names = ['pkg-%d' % i for i in range(pkgs)]
+    pkgsVersions = {name: _history(rng, maxVersions) for name in names}
+
+    pkgsVersionsSpecs = {}
+    for (i, name) in enumerate(names):
+        lo = _layer_start(_layer(i, pkgs, layers) + 1, pkgs, layers)
+        pkgVersionsSpecs = pkgsVersionsSpecs[name] = {}
+        latest = pkgsVersions[name][-1]
+        for version in pkgsVersions[name]:
+            depsSpecs = pkgVersionsSpecs[version] = {}
+            if lo >= pkgs:
+                continue
+            if i == 0:
+                fanOut = 3 * maxDeps
+            else:
+                fanOut = min(int(rng.paretovariate(1.2)) - 1, maxDeps)
+            for _ in range(fanOut):
+                # popular pkgs are at the start of the lower layers
+                dep = names[lo + int((pkgs - lo) * rng.random() ** 3)]
+                depVersions = pkgsVersions[dep]
+                depsSpecs[dep] = [_spec(rng, depVersions, depVersions[-1] if version is latest else None)]
+
+    for _ in range(int(pkgs * conflictRate)):
+        _add_conflicting_diamond(rng, names, pkgsVersions, pkgsVersionsSpecs, layers)
+
+    pkgsYanked = {}
+    for name in names:
+        versions = pkgsVersions[name]
+        yanked = [v for v in versions[:-1] if rng.random() < yankRate]
+        if yanked:
+            pkgsYanked[name] = yanked
+
+    return (pkgsVersionsSpecs, pkgsYanked, names[0])
+
+
+def _history(rng, maxVersions):
+    count = min(int(rng.paretovariate(1.0)), maxVersions)
+    major, minor, patch = (rng.choice((0, 1, 1, 2)), 0, 0)
+    versions = [base.Version(major, minor, patch)]
+    for _ in range(count - 1):
+        bump = rng.random()
+        if bump < 0.05:
+            major, minor, patch = (major + 1, 0, 0)
+        elif bump < 0.3:
+            minor, patch = (minor + 1, 0)
+        else:
+            patch += 1
+        versions.append(base.Version(major, minor, patch))
+    return versions
+
+
+def _spec(rng, versions, allowed=None):
+    """A spec on one of versions; it matches allowed when given."""
+    for _ in range(5):
+        spec = _random_spec(rng, versions)
+        if allowed is None or spec.match(allowed):
+            return spec
+    return base.Spec.from_str('^%s' % allowed)
+
+
+def _random_spec(rng, versions):
+    # Prefer recent versions, like real dependents do.
+    version = versions[len(versions) - 1 - int(len(versions) * rng.random() ** 2)]
+    kind = rng.random()
+    if kind < 0.55:
+        return base.Spec.from_str('^%s' % version)
+    elif kind < 0.75:
+        return base.Spec.from_str('~%s' % version)
+    elif kind < 0.95:
+        return base.Spec.from_str('>=%s,<%d.0.0' % (version, version.major + 2))
+    else:
+        return base.Spec.from_str('==%s' % version)
+
+
+def _layer(i, pkgs, layers):
+    """The layer of the i-th pkg: the root is alone in layer 0, the other
+    pkgs are in layers 1..layers.
+    """
+    return 1 + (i - 1) * layers // (pkgs - 1) if i else 0
+
+
+def _layer_start(layer, pkgs, layers):
+    """The index of the first pkg of layer (or later)."""
+    return 1 - (-(pkgs - 1) * (layer - 1) // layers) if layer else 0
+
+
+def _add_conflicting_diamond(rng, names, pkgsVersions, pkgsVersionsSpecs, layers):
+    """Make the latest versions of two deps of a pkg disagree on a common dep."""
+    pkg = rng.choice(names)
+    depsSpecs = pkgsVersionsSpecs[pkg][pkgsVersions[pkg][-1]]
+    deps = sorted(depsSpecs)
+    if len(deps) < 2:
+        return
+    (left, right) = rng.sample(deps, 2)
+    lowest = max(_layer(_index(left), len(names), layers), _layer(_index(right), len(names), layers))
+    shared = names[_layer_start(lowest + 1, len(names), layers):]
+    if not shared:
+        return
+    shared = rng.choice(shared)
+    sharedVersions = pkgsVersions[shared]
+    if len(sharedVersions) < 2:
+        return
+    pkgsVersionsSpecs[left][pkgsVersions[left][-1]][shared] = [
+        base.Spec.from_str('==%s' % sharedVersions[-1])
+    ]
+    pkgsVersionsSpecs[right][pkgsVersions[right][-1]][shared] = [
+        base.Spec.from_str('==%s' % sharedVersions[0])
+    ]
+
+
+def _index(name):
+    return int(name.split('-')[1])
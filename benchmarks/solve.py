@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Discover and solve synthetic registries of increasing sizes.
+
+For each size, the graph below the root is discovered through an
+in-process `edge_server.EdgeServer` and then solved. Peak memory is
+measured in a second, traced, run of the solver.
+
+``--graph`` picks what the solver runs on: the dict tree, an
+`edge.PkgsVersionsDepsBits` or an `edge_compact.CompactGraph` (the
+conversion is included in the solve time).
+
+Run with::
+
+    python -m benchmarks.solve --sizes 100 1000 10000 100000 [--graph compact]
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+import tracemalloc
+
+from semantic_version import edge
+from semantic_version import edge_compact
+from semantic_version import edge_server
+
+from . import registry
+
+
+def _compact(pkgsVersionsDeps, root):
+    graph = edge_compact.CompactGraph.from_versions(pkgsVersionsDeps)
+    return (graph, graph.pkg_id(root))
+
+
+GRAPHS = {
+    'dict': (edge.State, lambda pkgsVersionsDeps, root: (pkgsVersionsDeps, root)),
+    'bits': (edge.BitsState, lambda pkgsVersionsDeps, root: (
+        edge.PkgsVersionsDepsBits.from_versions(pkgsVersionsDeps), root)),
+    'compact': (edge.BitsState, _compact),
+}
+
+
+def run(size, seed, graph='dict'):
+    (pkgsVersionsSpecs, pkgsYanked, root) = registry.generate(size, seed=seed)
+    server = edge_server.EdgeServer(pkgsVersionsSpecs, pkgsYanked)
+
+    start = time.perf_counter()
+    discovery = edge.EdgeDiscovery(server.retrieve)
+    discovery.update({root: pkgsVersionsSpecs[root]})
+    discovery.run()
+    pkgsVersionsDeps = discovery.pkgs_versions_deps(root)
+    discoverTime = time.perf_counter() - start
+
+    (stateClass, convert) = GRAPHS[graph]
+
+    start = time.perf_counter()
+    state = None
+    try:
+        (converted, convertedRoot) = convert(pkgsVersionsDeps, root)
+        state = stateClass(converted, convertedRoot)
+        state.attempt_pkg_traversal(convertedRoot)
+        solved = sum(1 for version in state.pkgsLocked.values() if version is not None)
+    except edge.NotSolved:
+        solved = 'unsat'
+    solveTime = time.perf_counter() - start
+    explored = 0 if state is None else state.explored
+
+    tracemalloc.start()
+    try:
+        (converted, convertedRoot) = convert(pkgsVersionsDeps, root)
+        stateClass(converted, convertedRoot).attempt_pkg_traversal(convertedRoot)
+    except edge.NotSolved:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'size': size,
+        'discovered': len(pkgsVersionsDeps),
+        'rounds': discovery.rounds,
+        'discover': discoverTime,
+        'solve': solveTime,
+        'solved': solved,
+        'explored': explored,
+        'peak': peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--graph', choices=sorted(GRAPHS), default='dict',
+                        help="the representation the solver runs on")
+    args = parser.parse_args()
+
+    header = "%8s %10s %6s %10s %10s %8s %9s %9s" % (
+        "pkgs", "discovered", "rounds", "discover", "solve", "locked", "explored", "peak MB",
+    )
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        result = run(size, args.seed, args.graph)
+        print("%(size)8d %(discovered)10d %(rounds)6d %(discover)9.3fs %(solve)9.3fs %(solved)8s %(explored)9s" % result
+              + " %9.1f" % (result['peak'] / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Scaling of edge.solve_components across processes.
+
+The root depends on a number of clusters which share no dependencies; each
+cluster is a layered graph where every pkg depends on a few pkgs of the
+next layer.
+
+Run with::
+
+    python -m benchmarks.solve_components --clusters 16 --size 400
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sortedcontainers import SortedSet
+
+from semantic_version import base
+from semantic_version import edge
+
+
+ROOT = 'root'
+
+
+def generate(clusters, size, versions=8, layerSize=20, fanOut=3, seed=0):
+    rng = random.Random(seed)
+    allVersions = [base.Version(1, minor, 0) for minor in range(versions)]
+    pkgsVersionsDeps = {}
+    rootDeps = {}
+
+    for cluster in range(clusters):
+        names = ['c%d-p%d' % (cluster, i) for i in range(size)]
+        for (i, name) in enumerate(names):
+            layerEnd = (i // layerSize + 1) * layerSize
+            nextLayer = names[layerEnd:layerEnd + layerSize]
+            pkgVersionsDeps = pkgsVersionsDeps[name] = {}
+            for version in allVersions:
+                deps = rng.sample(nextLayer, min(fanOut, len(nextLayer)))
+                pkgVersionsDeps[version] = {
+                    dep: SortedSet(allVersions[rng.randrange(versions // 2):])
+                    for dep in deps
+                }
+        rootDeps[names[0]] = SortedSet(allVersions)
+
+    pkgsVersionsDeps[ROOT] = {base.Version(1, 0, 0): rootDeps}
+    return pkgsVersionsDeps
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clusters', type=int, default=16)
+    parser.add_argument('--size', type=int, default=400, help="pkgs per cluster")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    pkgsVersionsDeps = generate(args.clusters, args.size)
+    print("%d pkgs in %d clusters" % (len(pkgsVersionsDeps), args.clusters))
+
+    baseline = timed(edge.solve, pkgsVersionsDeps, ROOT)
+    print("%-24s %8.3fs" % ("solve", baseline))
+    print("%-24s %8.3fs" % ("solve_components", timed(edge.solve_components, pkgsVersionsDeps, ROOT)))
+
+    for workers in args.workers:
+        with ProcessPoolExecutor(workers) as executor:
+            elapsed = timed(edge.solve_components, pkgsVersionsDeps, ROOT, executor)
+        print("%-24s %8.3fs  x%.2f" % ("%d workers" % workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Payload size and throughput of the edge wire format.
+
+Run with::
+
+    python -m benchmarks.wire_format --pkgs 50000
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import random
+import time
+
+from semantic_version import base
+from semantic_version import edge
+
+
+def generate(pkgs, versions=6, deps=3, seed=0):
+    """Yield ``(pkg, {version: {dep: specs}})`` for a synthetic registry."""
+    rng = random.Random(seed)
+    names = ['pkg-%d' % i for i in range(pkgs)]
+    specs = [
+        base.Spec.from_str(s)
+        for s in ('^1.0.0', '^1.2.0', '~1.4.0', '>=1.0.0,<3.0.0', '^2.0.0', '>=2.1.0')
+    ]
+    for name in names:
+        yield (name, {
+            base.Version(1 + i // 3, (i % 3) * 2, rng.randrange(4)): {
+                rng.choice(names): [rng.choice(specs)] for _ in range(deps)
+            }
+            for i in range(versions)
+        })
+
+
+def naive_lines(pkgsVersionsSpecs):
+    """The same response without interning, for comparison."""
+    for (pkg, pkgVersionsSpecs) in pkgsVersionsSpecs:
+        yield json.dumps([pkg, {
+            str(version): {dep: [str(s) for s in specs] for (dep, specs) in depsSpecs.items()}
+            for (version, depsSpecs) in pkgVersionsSpecs.items()
+        }], separators=(',', ':')) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pkgs', type=int, default=50000)
+    args = parser.parse_args()
+
+    registry = list(generate(args.pkgs))
+
+    start = time.perf_counter()
+    lines = list(edge.encode_response(registry))
+    encodeTime = time.perf_counter() - start
+    size = sum(len(line) for line in lines)
+    naiveSize = sum(len(line) for line in naive_lines(registry))
+
+    start = time.perf_counter()
+    decoded = 0
+    for _ in edge.decode_response(lines):
+        decoded += 1
+    decodeTime = time.perf_counter() - start
+
+    print("%d pkgs, %d lines" % (args.pkgs, len(lines)))
+    print("payload:  %10d bytes (%.1f%% of %d without interning)" % (size, 100.0 * size / naiveSize, naiveSize))
+    print("encode:   %10.3fs  %8.0f pkgs/s" % (encodeTime, args.pkgs / encodeTime))
+    print("decode:   %10.3fs  %8.0f pkgs/s  %6.1f MB/s" % (
+        decodeTime, decoded / decodeTime, size / decodeTime / 1e6,
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,3 +8,24 @@ from .base import compare, match, validate, Spec, VersionReq, Version
 
 __author__ = "Raphaël Barrois <raphael.barrois+semver@polytechnique.org>"
 __version__ = '2.6.0'
+
+
+# Submodules with heavier dependencies (sortedcontainers, Django, ...),
+# imported on first access as semantic_version.<name> on Python 3.7+.
+LAZY_SUBMODULES = (
+    'django_fields',
+    'edge',
+    'edge_async',
+    'edge_cache',
+    'edge_compact',
+    'edge_server',
+    'metrics',
+    'sqlite',
+)
+
+
+def __getattr__(name):
+    if name in LAZY_SUBMODULES:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
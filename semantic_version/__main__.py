@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Bulk operations on lists of versions, one per line.
+
+Run with::
+
+    python -m semantic_version sort [--reverse] < versions.txt
+    python -m semantic_version filter '>=1.0.0,<2.0.0' < versions.txt
+    python -m semantic_version max '^1.2.0' < versions.txt
+    python -m semantic_version validate < versions.txt
+    python -m semantic_version coerce < versions.txt
+
+Lines are read and processed in chunks; with ``--jobs``, chunks are handed
+to a pool of processes. Invalid versions are reported on stderr (except by
+``validate``, which prints them) and make the exit status 1, as does a
+``max`` without any match.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import functools
+import itertools
+import sys
+import time
+
+from . import base
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run the command line in argv; return the exit status."""
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+
+    parser = argparse.ArgumentParser(
+        prog='python -m semantic_version',
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="processes to spread the chunks over (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="lines per chunk (default: %(default)s)")
+    parser.add_argument('--stats', action='store_true',
+                        help="print the throughput on stderr")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    sort = commands.add_parser('sort', help="sort versions by precedence")
+    sort.add_argument('--reverse', '-r', action='store_true', help="highest first")
+    filter_ = commands.add_parser('filter', help="keep the versions matching SPEC")
+    filter_.add_argument('spec')
+    max_ = commands.add_parser('max', help="print the highest version matching SPEC")
+    max_.add_argument('spec')
+    commands.add_parser('validate', help="print the invalid versions")
+    commands.add_parser('coerce', help="print each line as a valid version")
+
+    args = parser.parse_args(argv)
+    if 'spec' in args:
+        try:
+            base.Spec.from_str(args.spec)
+        except ValueError as e:
+            parser.error(str(e))
+
+    start = time.time()
+    lines = _lines(stdin)
+    chunks = iter(lambda: list(itertools.islice(lines, args.chunk_size)), [])
+    (status, count) = COMMANDS[args.command](args, chunks, stdout, stderr)
+    if args.stats:
+        elapsed = time.time() - start
+        print("%s: %d lines in %.3fs (%d lines/s)" % (
+            args.command, count, elapsed, count / elapsed if elapsed else 0), file=stderr)
+    return status
+
+
+def _lines(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _map_chunks(func, chunks, jobs):
+    """Yield ``func(chunk)`` for each chunk, in order, over jobs processes."""
+    if jobs <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(jobs) as executor:
+        # A few chunks ahead of the output, not the whole input.
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) > 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _report_invalid(invalid, stderr):
+    for line in invalid:
+        print("Invalid version: %r" % line, file=stderr)
+
+
+# Inputs repeat the same versions a lot: line -> `base.version_key`.
+_keys = {}
+
+
+def _line_key(line):
+    try:
+        return _keys[line]
+    except KeyError:
+        pass
+    key = base.version_key(base.parse_memoized(line))
+    if len(_keys) >= base.PARSE_MEMO_SIZE:
+        _keys.clear()
+    _keys[line] = key
+    return key
+
+
+def _key_chunk(lines):
+    """Return the key of each line (None when invalid), and the invalid lines.
+
+    Keys sort and compare like the versions, but as plain strings: that's
+    much faster than comparing Versions.
+    """
+    keys = []
+    invalid = []
+    for line in lines:
+        try:
+            keys.append(_line_key(line))
+        except ValueError:
+            invalid.append(line)
+            keys.append(None)
+    return (keys, invalid)
+
+
+# Chunk functions: module level so that they can be sent to processes, they
+# return ``(result, invalid lines, line count)``.
+
+def _sort_chunk(reverse, lines):
+    (keys, invalid) = _key_chunk(lines)
+    pairs = sorted(
+        ((key, line) for (key, line) in zip(keys, lines) if key is not None),
+        reverse=reverse,
+    )
+    return (pairs, invalid, len(lines))
+
+
+def _matching(spec_string, lines):
+    """Return the ``(key, line)`` matching the spec, and the invalid lines."""
+    (lo, hi, excluded) = base.spec_key_bounds(base.spec_memoized(spec_string))
+    (keys, invalid) = _key_chunk(lines)
+    matching = [
+        (key, line) for (key, line) in zip(keys, lines)
+        if key is not None
+        and (lo is None or lo <= key)
+        and (hi is None or key < hi)
+        and not any(a <= key < b for (a, b) in excluded)
+    ]
+    return (matching, invalid)
+
+
+def _filter_chunk(spec_string, lines):
+    (matching, invalid) = _matching(spec_string, lines)
+    return ([line for (_key, line) in matching], invalid, len(lines))
+
+
+def _max_chunk(spec_string, lines):
+    (matching, invalid) = _matching(spec_string, lines)
+    return (max(matching) if matching else None, invalid, len(lines))
+
+
+def _validate_chunk(lines):
+    invalid = []
+    for line in lines:
+        try:
+            base.parse_memoized(line)
+        except ValueError:
+            invalid.append(line)
+    return (invalid, [], len(lines))
+
+
+def _coerce_chunk(lines):
+    coerced = []
+    invalid = []
+    for line in lines:
+        try:
+            coerced.append(str(base.parse_memoized(line, coerce=True)))
+        except ValueError:
+            invalid.append(line)
+    return (coerced, invalid, len(lines))
+
+
+# Commands: ``(args, chunks, stdout, stderr) -> (status, line count)``.
+
+def _stream(func, args, chunks, stdout, stderr):
+    """Write the lines returned by func for each chunk as they come."""
+    status = 0
+    count = 0
+    for (output, invalid, chunkCount) in _map_chunks(func, chunks, args.jobs):
+        count += chunkCount
+        for line in output:
+            stdout.write(line + '\n')
+        if invalid:
+            _report_invalid(invalid, stderr)
+            status = 1
+    return (status, count)
+
+
+def run_sort(args, chunks, stdout, stderr):
+    status = 0
+    count = 0
+    sortedChunks = []
+    for (pairs, invalid, chunkCount) in _map_chunks(
+            functools.partial(_sort_chunk, args.reverse), chunks, args.jobs):
+        count += chunkCount
+        sortedChunks.append(pairs)
+        if invalid:
+            _report_invalid(invalid, stderr)
+            status = 1
+    # Timsort merges the sorted runs.
+    pairs = sorted(itertools.chain.from_iterable(sortedChunks), reverse=args.reverse)
+    for (_key, line) in pairs:
+        stdout.write(line + '\n')
+    return (status, count)
+
+
+def run_filter(args, chunks, stdout, stderr):
+    return _stream(functools.partial(_filter_chunk, args.spec), args, chunks, stdout, stderr)
+
+
+def run_max(args, chunks, stdout, stderr):
+    status = 0
+    count = 0
+    best = None
+    for (chunkBest, invalid, chunkCount) in _map_chunks(
+            functools.partial(_max_chunk, args.spec), chunks, args.jobs):
+        count += chunkCount
+        if chunkBest is not None and (best is None or chunkBest > best):
+            best = chunkBest
+        if invalid:
+            _report_invalid(invalid, stderr)
+            status = 1
+    if best is None:
+        return (1, count)
+    stdout.write(best[1] + '\n')
+    return (status, count)
+
+
+def run_validate(args, chunks, stdout, stderr):
+    status = 0
+    count = 0
+    for (invalid, _none, chunkCount) in _map_chunks(_validate_chunk, chunks, args.jobs):
+        count += chunkCount
+        for line in invalid:
+            stdout.write(line + '\n')
+            status = 1
+    return (status, count)
+
+
+def run_coerce(args, chunks, stdout, stderr):
+    return _stream(_coerce_chunk, args, chunks, stdout, stderr)
+
+
+COMMANDS = {
+    'sort': run_sort,
+    'filter': run_filter,
+    'max': run_max,
+    'validate': run_validate,
+    'coerce': run_coerce,
+}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,8 +4,7 @@
 
 from __future__ import unicode_literals
 
-import functools
-import re
+import binascii
 
 
 from .compat import base_cmp
@@ -68,10 +67,31 @@ def identifier_list_cmp(a, b):
     return base_cmp(len(a), len(b))
 
 
+class _LazyRegex(object):
+    """A class attribute holding a compiled regex.
+
+    The pattern is compiled, and `re` imported, on first access: this keeps
+    ``import semantic_version`` cheap for command line tools. The compiled
+    regex then replaces the descriptor on its class.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __get__(self, instance, owner):
+        import re
+        regex = re.compile(self.pattern)
+        for cls in owner.__mro__:
+            for name, value in list(vars(cls).items()):
+                if value is self:
+                    setattr(cls, name, regex)
+        return regex
+
+
 class Version(object):
 
-    version_re = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:-([0-9a-zA-Z.-]+))?(?:\+([0-9a-zA-Z.-]+))?$')
-    partial_version_re = re.compile(r'^(\d+)(?:\.(\d+)(?:\.(\d+))?)?(?:-([0-9a-zA-Z.-]*))?(?:\+([0-9a-zA-Z.-]*))?$')
+    version_re = _LazyRegex(r'^(\d+)\.(\d+)\.(\d+)(?:-([0-9a-zA-Z.-]+))?(?:\+([0-9a-zA-Z.-]+))?$')
+    partial_version_re = _LazyRegex(r'^(\d+)(?:\.(\d+)(?:\.(\d+))?)?(?:-([0-9a-zA-Z.-]*))?(?:\+([0-9a-zA-Z.-]*))?$')
 
     def __init__(self, major, minor, patch, prerelease=(), build=(), partial=False):
         # Note: if partial is True, prerelease and build may or may not be None.
@@ -141,6 +161,7 @@ class Version(object):
             >>> Version.coerce('0.1+2-3+4_5')
             Version.parse(0, 1, 0, (), ('2-3', '4-5'))
         """
+        import re
         base_re = re.compile(r'^\d+(?:\.\d+(?:\.\d+)?)?')
 
         match = base_re.match(version_string)
@@ -331,6 +352,8 @@ class Version(object):
 
         def make_optional(orig_cmp_fun):
             """Convert a cmp-like function to consider 'None == *'."""
+            import functools
+
             @functools.wraps(orig_cmp_fun)
             def alt_cmp_fun(a, b):
                 if a is None or b is None:
@@ -411,6 +434,118 @@ class Version(object):
         return self.__compare_helper(other, lambda x: x >= 0, notimpl_target=False)
 
 
+class LazyVersion(Version):
+    """A Version which is parsed (with `parse_memoized`) the first time one of
+    its fields is needed, i.e. by a comparison.
+
+    ``str()`` returns the string as it is, without parsing it (unless it has
+    to be coerced), so invalid strings only raise ValueError once a field is
+    used.
+    """
+
+    def __init__(self, version_string, partial=False, coerce=False):
+        # Version.__init__ isn't called: the fields are properties, read from
+        # the parsed version.
+        self.version_string = version_string
+        self.parse_partial = partial
+        self.parse_coerce = coerce
+        self._version = None
+
+    def resolve(self):
+        """Return the parsed Version."""
+        if self._version is None:
+            self._version = parse_memoized(
+                self.version_string,
+                partial=self.parse_partial,
+                coerce=self.parse_coerce,
+            )
+        return self._version
+
+    major = property(lambda self: self.resolve().major)
+    minor = property(lambda self: self.resolve().minor)
+    patch = property(lambda self: self.resolve().patch)
+    prerelease = property(lambda self: self.resolve().prerelease)
+    build = property(lambda self: self.resolve().build)
+    partial = property(lambda self: self.resolve().partial)
+
+    def __str__(self):
+        if self._version is None and not self.parse_coerce:
+            return self.version_string
+        return str(self.resolve())
+
+    def __repr__(self):
+        # Built from the raw string, so that invalid values can be shown.
+        return '%s(%r%s)' % (
+            self.__class__.__name__,
+            self.version_string,
+            ', partial=True' if self.parse_partial else '',
+        )
+
+    def _resolved_comparison(op):
+        # Version's comparisons only accept instances of the same class;
+        # a LazyVersion compares with any Version, through its parsed value.
+        def compare(self, other):
+            if not isinstance(other, Version):
+                return NotImplemented
+            return op(self.resolve(), other)
+        return compare
+
+    __cmp__ = _resolved_comparison(lambda version, other: version.__cmp__(other))
+    __eq__ = _resolved_comparison(lambda version, other: version == other)
+    __ne__ = _resolved_comparison(lambda version, other: version != other)
+    __lt__ = _resolved_comparison(lambda version, other: version < other)
+    __le__ = _resolved_comparison(lambda version, other: version <= other)
+    __gt__ = _resolved_comparison(lambda version, other: version > other)
+    __ge__ = _resolved_comparison(lambda version, other: version >= other)
+    __hash__ = Version.__hash__
+
+    del _resolved_comparison
+
+
+#: How many strings `parse_memoized` and `spec_memoized` remember (per
+#: process).
+PARSE_MEMO_SIZE = 10000
+_parse_memo = {}
+
+
+def parse_memoized(version_string, partial=False, coerce=False):
+    """Like `Version.parse` (or `Version.coerce`), but each string is only
+    parsed once: the same Version is returned for it afterwards. Don't modify
+    the returned Version.
+
+    Up to PARSE_MEMO_SIZE strings are remembered; the memo is emptied once
+    it is full.
+    """
+    key = ('version', version_string, partial, coerce)
+    try:
+        return _parse_memo[key]
+    except KeyError:
+        pass
+
+    if coerce:
+        version = Version.coerce(version_string, partial=partial)
+    else:
+        version = Version.parse(version_string, partial=partial)
+    return _memoize(key, version)
+
+
+def spec_memoized(spec_string):
+    """Like `Spec.from_str`, remembering the Spec like `parse_memoized`."""
+    key = ('spec', spec_string)
+    try:
+        return _parse_memo[key]
+    except KeyError:
+        pass
+    return _memoize(key, Spec.from_str(spec_string))
+
+
+def _memoize(key, value):
+    if len(_parse_memo) >= PARSE_MEMO_SIZE:
+        _parse_memo.clear()
+    _parse_memo[key] = value
+    return value
+
+
 class VersionReq(object):
     """A requirement specification."""
 
@@ -433,7 +568,7 @@ class VersionReq(object):
         KIND_EMPTY: KIND_EQUAL,
     }
 
-    re_spec = re.compile(r'^(<|<=||=|==|>=|>|!=|\^|~|~=)(\d.*)$')
+    re_spec = _LazyRegex(r'^(<|<=||=|==|>=|>|!=|\^|~|~=)(\d.*)$')
 
     def __init__(self, kind, version):
         self.kind = kind
@@ -488,24 +623,60 @@ class VersionReq(object):
             return version > self.version
         elif self.kind == self.KIND_NEQ:
             return version != self.version
-        elif self.kind == self.KIND_CARET:
+        elif self.kind in (self.KIND_CARET, self.KIND_TILDE, self.KIND_COMPATIBLE):
+            return self.version <= version < self._upper()
+        else:  # pragma: no cover
+            raise ValueError('Unexpected match kind: %r' % self.kind)
+
+    def _upper(self):
+        """The (excluded) upper version of a CARET, TILDE or COMPATIBLE req."""
+        if self.kind == self.KIND_CARET:
             if self.version.major != 0:
-                upper = self.version.next_major()
+                return self.version.next_major()
             elif self.version.minor != 0:
-                upper = self.version.next_minor()
+                return self.version.next_minor()
             else:
-                upper = self.version.next_patch()
-            return self.version <= version < upper
+                return self.version.next_patch()
         elif self.kind == self.KIND_TILDE:
-            return self.version <= version < self.version.next_minor()
+            return self.version.next_minor()
         elif self.kind == self.KIND_COMPATIBLE:
             if self.version.patch is not None:
-                upper = self.version.next_minor()
+                return self.version.next_minor()
             else:
-                upper = self.version.next_major()
-            return self.version <= version < upper
+                return self.version.next_major()
         else:  # pragma: no cover
-            raise ValueError('Unexpected match kind: %r' % self.kind)
+            raise ValueError('Unexpected range kind: %r' % self.kind)
+
+    def _upper_bound(self):
+        try:
+            return self._upper()
+        except TypeError:
+            # A partial version without the part to bump, i.e. ``~1``.
+            return None
+
+    def bounds(self):
+        """Return the range of versions this requirement may match.
+
+        The result is ``(minimum, maximum, (min_inclusive, max_inclusive))``,
+        as taken by ``SortedSet.irange``; ``None`` leaves that side open.
+        Every matching version is within the range: ``!=`` and ``*``
+        requirements are not bounded, nor is the upper side when it can't
+        be computed (i.e. ``~1``).
+        """
+        if self.kind == self.KIND_LT:
+            return (None, self.version, (True, False))
+        elif self.kind == self.KIND_LTE:
+            return (None, self.version, (True, True))
+        elif self.kind == self.KIND_EQUAL:
+            return (self.version, self.version, (True, True))
+        elif self.kind == self.KIND_GTE:
+            return (self.version, None, (True, True))
+        elif self.kind == self.KIND_GT:
+            return (self.version, None, (False, True))
+        elif self.kind in (self.KIND_CARET, self.KIND_TILDE, self.KIND_COMPATIBLE):
+            return (self.version, self._upper_bound(), (True, False))
+        else:
+            return (None, None, (True, True))
 
     def __str__(self):
         return '{}{}'.format(self.kind, str(self.version))
@@ -594,3 +765,200 @@ def validate(version_string):
         return True
     except ValueError:
         return False
+
+
+def version_key(version):
+    """Return a string key which sorts like the (non-partial) version.
+
+    Keys only contain ``[0-9a-f]``, so that they sort the same whatever the
+    collation of a database column they are stored in (even a case
+    insensitive one). Versions which only differ by their build metadata
+    have no ordering; their keys are different, in an arbitrary order.
+
+    >>> version_key(Version.parse('1.10.0')) > version_key(Version.parse('1.9.0'))
+    True
+    """
+    if version.partial:
+        raise ValueError("Partial versions have no key: %r" % version)
+
+    key = [
+        _number_key(version.major),
+        _number_key(version.minor),
+        _number_key(version.patch),
+    ]
+    if version.prerelease:
+        # Lower than '2' for no prerelease; between identifiers '1' and at
+        # the end '0', which are lower than any identifier.
+        key.append('1')
+        key.append('1'.join(_identifier_key(item) for item in version.prerelease))
+        key.append('0')
+    else:
+        key.append('2')
+    if version.build:
+        key.append(_hex('.'.join(version.build)))
+    return ''.join(key)
+
+
+def version_from_key(key):
+    """Return the Version of a `version_key`."""
+    try:
+        (major, pos) = _read_number_key(key, 0)
+        (minor, pos) = _read_number_key(key, pos)
+        (patch, pos) = _read_number_key(key, pos)
+
+        prerelease = []
+        marker = key[pos]
+        pos += 1
+        if marker == '1':
+            while True:
+                (item, pos) = _read_identifier_key(key, pos)
+                prerelease.append(item)
+                separator = key[pos]
+                pos += 1
+                if separator == '0':
+                    break
+                elif separator != '1':
+                    raise ValueError(separator)
+        elif marker != '2':
+            raise ValueError(marker)
+
+        build = _unhex(key[pos:])
+    except (IndexError, ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid version key: %r" % key)
+
+    return Version(
+        major, minor, patch,
+        tuple(prerelease),
+        tuple(build.split('.')) if build else (),
+    )
+
+
+def version_key_range(version):
+    """Return the range ``(lo, hi)`` of the `version_key` of the versions
+    which are equal to version: ``lo <= key < hi``.
+
+    The missing fields of a partial version match any value, so the keys of
+    all its versions share a prefix.
+    """
+    if version.partial:
+        key = [_number_key(version.major)]
+        for number in (version.minor, version.patch):
+            if number is None:
+                return _prefix_range(''.join(key))
+            key.append(_number_key(number))
+        if version.prerelease is None:
+            return _prefix_range(''.join(key))
+        if version.build is None:
+            key = Version(version.major, version.minor, version.patch, version.prerelease)
+            return _prefix_range(version_key(key))
+        version = version.force_non_partial()
+
+    key = version_key(version)
+    # '0' is the lowest character of keys.
+    return (key, key + '0')
+
+
+def containing_key_ranges(version):
+    """Return the `version_key_range` of every version (partial or not) which
+    is equal to the (non-partial) version: the only ranges of keys which
+    contain its key and a ``!=`` requirement may exclude.
+    """
+    numbers = [version.major, version.minor, version.patch]
+    ranges = []
+    for count in (1, 2, 3):
+        fields = numbers[:count] + [None] * (3 - count)
+        ranges.append(version_key_range(Version(*fields, prerelease=None, build=None, partial=True)))
+    ranges.append(version_key_range(Version(
+        version.major, version.minor, version.patch, version.prerelease, None, partial=True)))
+    ranges.append(version_key_range(version))
+    return ranges
+
+
+def spec_key_bounds(spec):
+    """Return the keys of the versions matching spec (a Spec or VersionReq),
+    as ``(lo, hi, excluded)``.
+
+    A matching version has a `version_key` with ``lo <= key < hi`` (``None``
+    leaves that side open) which is in none of the ``(lo, hi)`` ranges of
+    excluded (``!=`` requirements).
+    """
+    lo = None
+    hi = None
+    excluded = []
+    for req in (spec.requirements if isinstance(spec, Spec) else (spec,)):
+        if req.kind == VersionReq.KIND_ANY:
+            continue
+
+        (reqLo, reqHi) = version_key_range(req.version)
+        if req.kind == VersionReq.KIND_NEQ:
+            excluded.append((reqLo, reqHi))
+            continue
+        elif req.kind == VersionReq.KIND_LT:
+            (reqLo, reqHi) = (None, reqLo)
+        elif req.kind == VersionReq.KIND_LTE:
+            reqLo = None
+        elif req.kind == VersionReq.KIND_GT:
+            (reqLo, reqHi) = (reqHi, None)
+        elif req.kind == VersionReq.KIND_GTE:
+            reqHi = None
+        elif req.kind in (VersionReq.KIND_CARET, VersionReq.KIND_TILDE, VersionReq.KIND_COMPATIBLE):
+            upper = req._upper_bound()
+            reqHi = None if upper is None else version_key_range(upper)[0]
+
+        if reqLo is not None and (lo is None or reqLo > lo):
+            lo = reqLo
+        if reqHi is not None and (hi is None or reqHi < hi):
+            hi = reqHi
+    return (lo, hi, excluded)
+
+
+def _prefix_range(prefix):
+    # 'g' is above every character of keys.
+    return (prefix, prefix + 'g')
+
+
+def _number_key(number):
+    # The length first, so that 10 sorts after 9.
+    digits = str(number)
+    if len(digits) > 99:
+        raise ValueError("Version number too large for a key: %s" % digits)
+    return '%02d%s' % (len(digits), digits)
+
+
+def _read_number_key(key, pos):
+    length = int(key[pos:pos + 2])
+    digits = key[pos + 2:pos + 2 + length]
+    if len(digits) != length or not digits.isdigit():
+        raise ValueError(digits)
+    return (int(digits), pos + 2 + length)
+
+
+def _identifier_key(identifier):
+    # Numeric identifiers ('2') sort before the others ('3'), which sort as
+    # their ASCII bytes. Every hex byte of an identifier starts with a digit
+    # from '2' to '7', above the separators.
+    if identifier.isdigit():
+        return '2' + _number_key(int(identifier))
+    return '3' + _hex(identifier)
+
+
+def _read_identifier_key(key, pos):
+    tag = key[pos]
+    if tag == '2':
+        (number, pos) = _read_number_key(key, pos + 1)
+        return (str(number), pos)
+    elif tag != '3':
+        raise ValueError(tag)
+
+    end = pos + 1
+    while key[end] not in '01':
+        end += 2
+    return (_unhex(key[pos + 1:end]), end)
+
+
+def _hex(text):
+    return binascii.hexlify(text.encode('ascii')).decode('ascii')
+
+
+def _unhex(text):
+    return binascii.unhexlify(text.encode('ascii')).decode('ascii')
@@ -4,6 +4,8 @@
 
 from __future__ import unicode_literals
 
+from django.core import checks
+from django.core.exceptions import FieldError
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
@@ -48,6 +50,8 @@ class VersionField(SemVerField):
     def __init__(self, *args, **kwargs):
         self.partial = kwargs.pop('partial', False)
         self.coerce = kwargs.pop('coerce', False)
+        self.sortable = kwargs.pop('sortable', False)
+        self.lazy = kwargs.pop('lazy', False)
         super(VersionField, self).__init__(*args, **kwargs)
 
     def deconstruct(self):
@@ -55,18 +59,251 @@ class VersionField(SemVerField):
         name, path, args, kwargs = super(VersionField, self).deconstruct()
         kwargs['partial'] = self.partial
         kwargs['coerce'] = self.coerce
+        if self.sortable:
+            kwargs['sortable'] = self.sortable
+        if self.lazy:
+            kwargs['lazy'] = self.lazy
         return name, path, args, kwargs
 
+    def check(self, **kwargs):
+        errors = super(VersionField, self).check(**kwargs)
+        if self.sortable and self.partial:
+            errors.append(checks.Error(
+                "Partial versions have no ordering, they can't be sortable.",
+                hint="Remove partial=True or sortable=True.",
+                obj=self,
+                id='semantic_version.E001',
+            ))
+        return errors
+
+    @property
+    def key_name(self):
+        """The name of the companion `VersionKeyField` of a sortable field."""
+        return '%s_key' % self.name
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(VersionField, self).contribute_to_class(cls, name, *args, **kwargs)
+        if self.sortable and not cls._meta.abstract and not _has_field(cls, self.key_name):
+            key_field = VersionKeyField(
+                source=name,
+                max_length=2 * self.max_length + 16,
+                null=self.null,
+                blank=True,
+            )
+            cls.add_to_class(self.key_name, key_field)
+
+    def from_db_value(self, value, expression, connection, context):
+        """Convert from the database format.
+
+        With lazy=True, the values are `base.LazyVersion`: they are only
+        parsed when they are compared or their fields are used, not when
+        they are just rendered.
+        """
+        if self.lazy and value:
+            return base.LazyVersion(value, partial=self.partial, coerce=self.coerce)
+        return self.to_python(value)
+
     def to_python(self, value):
         """Converts any value to a base.Version field."""
         if value is None or value == '':
             return value
         if isinstance(value, base.Version):
             return value
-        if self.coerce:
-            return base.Version.coerce(value, partial=self.partial)
-        else:
-            return base.Version.parse(value, partial=self.partial)
+        # The same versions come up in many rows.
+        return base.parse_memoized(value, partial=self.partial, coerce=self.coerce)
+
+
+class DerivedField(models.CharField):
+    """A column computed from the field named ``source`` of the same model.
+
+    These are added to the model by the source field. They are computed
+    whenever an instance is saved; ``QuerySet.update()`` doesn't update them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.source = kwargs.pop('source')
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('max_length', 416)
+        super(DerivedField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(DerivedField, self).deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        # Models rendered by migrations get both this field and the field
+        # that adds it, in any order.
+        if not _has_field(cls, name):
+            super(DerivedField, self).contribute_to_class(cls, name, *args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        source = model_instance._meta.get_field(self.source)
+        value = source.to_python(getattr(model_instance, source.attname))
+        value = None if value in (None, '') else self.derive(value)
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def derive(self, value):
+        raise NotImplementedError()
+
+
+class VersionKeyField(DerivedField):
+    """The `base.version_key` of the VersionField named ``source``.
+
+    A ``VersionField(sortable=True)`` adds one to its model, named
+    ``<name>_key``, so that the database can sort and compare versions
+    through its index::
+
+        Release.objects.order_by('-version_key')
+    """
+    description = _("Version sort key")
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('db_index', True)
+        super(VersionKeyField, self).__init__(*args, **kwargs)
+
+    def derive(self, version):
+        return base.version_key(version)
+
+
+class SpecBoundField(DerivedField):
+    """One of the `base.spec_key_bounds` of the SpecField named ``source``.
+
+    A ``SpecField(bounds=True)`` adds three of them to its model:
+
+    - ``<name>_lo`` and ``<name>_hi``, the range of the keys of the matching
+      versions (NULL when open);
+    - ``<name>_excluded``, the ranges excluded by ``!=`` requirements, as
+      ``,hi1,hi2,`` (the upper end identifies a range, see
+      `base.version_key_range`).
+    """
+    description = _("Version specification bound")
+
+    BOUNDS = ('lo', 'hi', 'excluded')
+
+    def __init__(self, *args, **kwargs):
+        self.bound = kwargs.pop('bound')
+        if self.bound != 'excluded':
+            kwargs.setdefault('db_index', True)
+        super(SpecBoundField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(SpecBoundField, self).deconstruct()
+        kwargs['bound'] = self.bound
+        return name, path, args, kwargs
+
+    def derive(self, spec):
+        lo, hi, excluded = base.spec_key_bounds(spec)
+        if self.bound == 'lo':
+            return lo
+        elif self.bound == 'hi':
+            return hi
+        # Never NULL for a spec, so that NOT LIKE leaves out NULL specs.
+        return ','.join([''] + [excluded_hi for _lo, excluded_hi in excluded] + [''])
+
+
+class SatisfiesLookup(models.Lookup):
+    """``version__satisfies=spec``: the versions which match a Spec.
+
+    The spec is turned into a range of the key column of a sortable
+    VersionField (see `base.spec_key_bounds`), so the database answers it
+    from the index::
+
+        Release.objects.filter(version__satisfies='^1.2.0,!=1.4.1')
+    """
+    lookup_name = 'satisfies'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        field = self.lhs.output_field
+        if not getattr(field, 'sortable', False):
+            raise FieldError(
+                "%s__satisfies needs a VersionField(sortable=True)" % field.name)
+        key_field = field.model._meta.get_field(field.key_name)
+        key_sql, key_params = compiler.compile(key_field.get_col(self.lhs.alias))
+
+        spec = self.rhs
+        if not isinstance(spec, base.Spec):
+            spec = base.Spec.from_str(spec)
+        lo, hi, excluded = base.spec_key_bounds(spec)
+
+        conditions = []
+        params = []
+        ranges = []
+        if lo is not None:
+            ranges.append(('%s >= %%s', lo))
+        if hi is not None:
+            ranges.append(('%s < %%s', hi))
+        if not ranges:
+            conditions.append('%s IS NOT NULL' % key_sql)
+            params.extend(key_params)
+        for condition, key in ranges:
+            conditions.append(condition % key_sql)
+            params.extend(key_params)
+            params.append(key)
+        for excluded_lo, excluded_hi in excluded:
+            conditions.append('NOT (%s >= %%s AND %s < %%s)' % (key_sql, key_sql))
+            params.extend(key_params)
+            params.append(excluded_lo)
+            params.extend(key_params)
+            params.append(excluded_hi)
+        return ' AND '.join(conditions), params
+
+
+class VersionKey(models.F):
+    """The key column of the sortable VersionField named ``name``.
+
+    Ordering by it sorts by version, also within a window::
+
+        Release.objects.annotate(latest=Window(
+            FirstValue('version'),
+            partition_by=F('package'),
+            order_by=VersionKey('version').desc(),
+        ))
+    """
+
+    def __init__(self, name):
+        super(VersionKey, self).__init__('%s_key' % name)
+
+
+class _VersionKeyAggregate(object):
+    """Aggregate the key column of a sortable VersionField, and convert the
+    result back to a Version.
+    """
+
+    def __init__(self, name, **extra):
+        self.version_name = name
+        super(_VersionKeyAggregate, self).__init__(VersionKey(name), **extra)
+
+    @property
+    def default_alias(self):
+        return '%s__%s' % (self.version_name, self.name.lower())
+
+    def get_db_converters(self, connection):
+        converters = super(_VersionKeyAggregate, self).get_db_converters(connection)
+        return converters + [self._from_key]
+
+    @staticmethod
+    def _from_key(value, *args):
+        return None if value is None else base.version_from_key(value)
+
+
+class MaxVersion(_VersionKeyAggregate, models.Max):
+    """The highest version of a sortable VersionField::
+
+        Release.objects.values('package').annotate(latest=MaxVersion('version'))
+    """
+    name = 'MaxVersion'
+
+
+class MinVersion(_VersionKeyAggregate, models.Min):
+    """The lowest version of a sortable VersionField."""
+    name = 'MinVersion'
+
+
+def _has_field(cls, name):
+    return any(field.name == name for field in cls._meta.local_fields)
 
 
 class SpecField(SemVerField):
@@ -75,10 +312,88 @@ class SpecField(SemVerField):
     }
     description = _("Version specification list")
 
+    def __init__(self, *args, **kwargs):
+        self.bounds = kwargs.pop('bounds', False)
+        super(SpecField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        """Handle django.db.migrations."""
+        name, path, args, kwargs = super(SpecField, self).deconstruct()
+        if self.bounds:
+            kwargs['bounds'] = self.bounds
+        return name, path, args, kwargs
+
+    def bound_name(self, bound):
+        """The name of the `SpecBoundField` for bound, with bounds=True."""
+        return '%s_%s' % (self.name, bound)
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(SpecField, self).contribute_to_class(cls, name, *args, **kwargs)
+        if not self.bounds or cls._meta.abstract:
+            return
+        for bound in SpecBoundField.BOUNDS:
+            if not _has_field(cls, self.bound_name(bound)):
+                bound_field = SpecBoundField(
+                    source=name,
+                    bound=bound,
+                    max_length=2 * self.max_length + 16,
+                    null=True,
+                    blank=True,
+                )
+                cls.add_to_class(self.bound_name(bound), bound_field)
+
     def to_python(self, value):
         """Converts any value to a base.Spec field."""
         if value is None or value == '':
             return value
         if isinstance(value, base.Spec):
             return value
-        return base.Spec.from_str(value)
+        # The same specs come up in many rows.
+        return base.spec_memoized(value)
+
+
+class AdmitsLookup(models.Lookup):
+    """``spec__admits=version``: the specs which match a version.
+
+    It is answered from the bound columns of a ``SpecField(bounds=True)``,
+    without loading the specs::
+
+        Advisory.objects.filter(affected__admits='1.4.2')
+    """
+    lookup_name = 'admits'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        field = self.lhs.output_field
+        if not getattr(field, 'bounds', False):
+            raise FieldError(
+                "%s__admits needs a SpecField(bounds=True)" % field.name)
+
+        version = self.rhs
+        if not isinstance(version, base.Version):
+            version = base.Version.parse(version)
+        key = base.version_key(version)
+
+        columns = {}
+        for bound in SpecBoundField.BOUNDS:
+            bound_field = field.model._meta.get_field(field.bound_name(bound))
+            columns[bound] = compiler.compile(bound_field.get_col(self.lhs.alias))
+        lo_sql, lo_params = columns['lo']
+        hi_sql, hi_params = columns['hi']
+        excluded_sql, excluded_params = columns['excluded']
+
+        conditions = [
+            '(%s IS NULL OR %s <= %%s)' % (lo_sql, lo_sql),
+            '(%s IS NULL OR %%s < %s)' % (hi_sql, hi_sql),
+        ]
+        params = list(lo_params) + list(lo_params) + [key]
+        params += list(hi_params) + [key] + list(hi_params)
+        # The only excluded ranges which can contain the version.
+        for _lo, excluded_hi in base.containing_key_ranges(version):
+            conditions.append('%s NOT LIKE %%s' % excluded_sql)
+            params += list(excluded_params) + ['%%,%s,%%' % excluded_hi]
+        return ' AND '.join(conditions), params
+
+
+VersionField.register_lookup(SatisfiesLookup)
+SpecField.register_lookup(AdmitsLookup)
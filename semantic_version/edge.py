@@ -1,15 +1,183 @@
+import collections
+import hashlib
 import itertools
+import json
 
 from . import base
 from sortedcontainers import SortedDict
 from sortedcontainers import SortedSet
 
-def solve(pkgsVersionsDeps, root):
-    state = State(pkgsVersionsDeps)
+def solve(pkgsVersionsDeps, root, pkgsLockedHint=None):
+    """Lock a version for root and the pkgs it (transitively) depends on.
+
+    Raises NotSolved if there is no solution. Inputs which are unsatisfiable
+    without needing any search are detected by the initial propagation.
+
+    pkgsLockedHint is a previous result of `solve`. Its versions are
+    preferred, and the pkgs which are not affected by changes since then
+    are kept as they are without being searched again. Use `diff_locked` to
+    find out which pkgs moved.
+    """
+    state = State(pkgsVersionsDeps, root, pkgsLockedHint)
     state.attempt_pkg_traversal(root)
     return state.pkgsLocked
 
 
+def diff_locked(pkgsLockedPrev, pkgsLocked):
+    """Return the pkgs whose locked version changed: `pkg -> (prev, new)`.
+
+    Pkgs which were added or removed have `None` as their prev or new
+    version.
+    """
+    moved = {}
+    for pkg in set(pkgsLockedPrev).union(pkgsLocked):
+        prev = pkgsLockedPrev.get(pkg)
+        new = pkgsLocked.get(pkg)
+        if prev != new:
+            moved[pkg] = (prev, new)
+    return moved
+
+
+def solve_components(pkgsVersionsDeps, root, executor=None):
+    """Like `solve`, but the pkgs below root are split into groups which share
+    no (transitive) dependencies and each group is solved on its own.
+
+    executor is an optional `concurrent.futures.Executor` to map the groups
+    over. `solve` is the default for a reason: on one core, this was slower
+    than `solve` by itself, and about 6 times slower with a
+    ProcessPoolExecutor, which pickles each group. Only use an executor once
+    ``benchmarks/solve_components.py`` shows a speedup on the target
+    machine.
+    """
+    pkgsDomains = PkgsDomains(pkgsVersionsDeps, root)
+    pkgsGraph = pkgs_graph(pkgsVersionsDeps)
+
+    for version in pkgsDomains.candidates(root):
+        depsVersions = pkgsVersionsDeps[root][version]
+        subProblems = []
+        for component in independent_components(pkgsGraph, root, depsVersions):
+            subProblem = {
+                pkg: pkgsVersionsDeps[pkg]
+                for pkg in component
+                if pkg in pkgsVersionsDeps
+            }
+            subProblem[root] = {
+                version: {
+                    dep: depVersions
+                    for (dep, depVersions) in depsVersions.items()
+                    if dep in component
+                },
+            }
+            subProblems.append(subProblem)
+
+        if executor is None:
+            mapper = map
+        else:
+            mapper = executor.map
+
+        pkgsLocked = {pkg: None for pkg in pkgsVersionsDeps.keys()}
+        try:
+            for result in mapper(_solve_component, subProblems, [root] * len(subProblems)):
+                pkgsLocked.update(result)
+        except NotSolved:
+            # One of the groups has no solution with root at this version.
+            continue
+        pkgsLocked[root] = version
+        return pkgsLocked
+
+    raise NotSolved(root)
+
+
+def _solve_component(pkgsVersionsDeps, root):
+    return solve(pkgsVersionsDeps, root)
+
+
+def pkgs_graph(pkgsVersionsDeps):
+    """Return `pkg -> set(deps)` with the deps of all versions of each pkg."""
+    pkgsGraph = {}
+    for (pkg, pkgVersionsDeps) in pkgsVersionsDeps.items():
+        deps = pkgsGraph.setdefault(pkg, set())
+        for depsVersions in pkgVersionsDeps.values():
+            deps.update(depsVersions.keys())
+    return pkgsGraph
+
+
+def independent_components(pkgsGraph, root, deps):
+    """Group deps (of root) with everything they transitively depend on.
+
+    Two groups never share a pkg, so each of them can be solved without
+    looking at the others. root itself is not part of any group.
+    """
+    # union-find over the index of the group each pkg was first reached from
+    parents = []
+    owner = {}
+
+    def find(group):
+        while parents[group] != group:
+            parents[group] = parents[parents[group]]
+            group = parents[group]
+        return group
+
+    for dep in deps:
+        if dep == root:
+            continue
+        if dep in owner:
+            continue
+        group = len(parents)
+        parents.append(group)
+        owner[dep] = group
+        queue = collections.deque([dep])
+        while queue:
+            pkg = queue.popleft()
+            for pkgDep in pkgsGraph.get(pkg, ()):
+                if pkgDep == root:
+                    continue
+                if pkgDep in owner:
+                    # Already reached (with everything below it) from
+                    # another group: they are not independent.
+                    parents[find(owner[pkgDep])] = find(group)
+                    continue
+                owner[pkgDep] = group
+                queue.append(pkgDep)
+
+    components = {}
+    for (pkg, group) in owner.items():
+        components.setdefault(find(group), set()).add(pkg)
+    return list(components.values())
+
+
+def fingerprint(pkgsVersionsDeps, root, pkgsLockedHint=None):
+    """Return a digest of the inputs of `solve`.
+
+    The digest does not depend on the order of the pkgs, versions and
+    dependencies in the (nested) containers, so equal inputs always get the
+    same fingerprint. Pkgs are identified by their ``str()``: they should be
+    strings, as elsewhere.
+    """
+    digest = hashlib.sha256()
+
+    def feed(*items):
+        for item in items:
+            digest.update(str(item).encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(b'\n')
+
+    feed('root', root)
+    for pkg in sorted(pkgsVersionsDeps, key=str):
+        feed('pkg', pkg)
+        pkgVersionsDeps = pkgsVersionsDeps[pkg]
+        for version in sorted(pkgVersionsDeps, key=str):
+            feed('version', version)
+            depsVersions = pkgVersionsDeps[version]
+            for dep in sorted(depsVersions, key=str):
+                feed('dep', dep, *sorted(str(v) for v in depsVersions[dep]))
+    # The hint changes which solution is found.
+    if pkgsLockedHint is not None:
+        for pkg in sorted(pkgsLockedHint, key=str):
+            feed('hint', pkg, pkgsLockedHint[pkg])
+    return digest.hexdigest()
+
+
 def initialize_edges(pkgsVersionsSpecs):
     """Helper function to initialize a map of edges."""
     return {
@@ -78,7 +246,7 @@ class Edges(object):
     @classmethod
     def from_specs(cls, specs):
         edges = cls()
-        self.extend(specs)
+        edges.extend(specs)
         return edges
 
     def extend(self, specs):
@@ -151,6 +319,20 @@ class Edges(object):
         else:  # pragma: no cover
             raise ValueError('Unexpected match kind: %r' % kind)
 
+    def difference(self, other):
+        """Return the edges which are not in other."""
+        edges = Edges()
+        edges.reqs_lt = self.reqs_lt.difference(other.reqs_lt)
+        edges.reqs_gte = self.reqs_gte.difference(other.reqs_gte)
+        return edges
+
+    def key(self):
+        """A hashable key, equal for all Edges containing the same edges."""
+        return (
+            frozenset(req.version for req in self.reqs_lt),
+            frozenset(req.version for req in self.reqs_gte),
+        )
+
     def __repr__(self):
         return "Edges({})".format(
             ', '.join(str(r) for r in iter(self))
@@ -162,6 +344,9 @@ class Edges(object):
             self.reqs_gte,
         )
 
+    def __len__(self):
+        return len(self.reqs_lt) + len(self.reqs_gte)
+
 
 class PkgsVersionDepsMap(dict):
     """A dictionary tree representing `pkgs -> version -> dependencies -> container`.
@@ -199,6 +384,8 @@ class PkgsVersionsDepsVersions(dict):
         """Given a new (possibly updated) set of pkgsVersionsSpecs, update the
         avilable versions.
         """
+        # dep -> SortedSet of pkgsVersions[dep], to take ranges out of it.
+        sortedVersions = {}
 
         for (pkg, pkgVersionsSpecs) in pkgsVersionsSpecs.items():
                 if pkg not in self:
@@ -216,10 +403,53 @@ class PkgsVersionsDepsVersions(dict):
                         if dep not in sDepsVersions:
                             sDepsVersions[dep] = SortedSet()
 
+                        if dep not in sortedVersions:
+                            depVersions = pkgsVersions[dep]
+                            if not isinstance(depVersions, SortedSet):
+                                depVersions = SortedSet(depVersions)
+                            sortedVersions[dep] = depVersions
+
                         sDepsVersions[dep].update(
-                            filter_by_specs(specs, pkgsVersions[dep])
+                            filter_sorted_by_specs(specs, sortedVersions[dep])
                         )
 
+
+def filter_sorted_by_specs(specs, versions):
+    """Like `filter_by_specs`, for a SortedSet of versions.
+
+    Only the range of versions within the `bounds` of every requirement is
+    looked at, which is found by bisecting versions. They are still checked
+    against the specs since ``!=`` has no bounds and build metadata has no
+    ordering.
+    """
+    (lo, hi) = specs_range(
+        specs, versions.bisect_left, versions.bisect_right, 0, len(versions))
+    if lo >= hi:
+        return iter(())
+    return filter_by_specs(specs, versions.islice(lo, hi))
+
+
+def specs_range(specs, bisect_left, bisect_right, lo, hi):
+    """Narrow the range [lo, hi) of some sorted versions to the `bounds` of
+    every requirement of specs.
+
+    bisect_left and bisect_right bisect the sorted versions for a version.
+    """
+    for spec in specs:
+        for req in (spec.requirements if isinstance(spec, base.Spec) else (spec,)):
+            (minimum, maximum, (minInclusive, maxInclusive)) = req.bounds()
+            if minimum is not None:
+                if minInclusive:
+                    lo = max(lo, bisect_left(minimum))
+                else:
+                    lo = max(lo, bisect_right(minimum))
+            if maximum is not None:
+                if maxInclusive:
+                    hi = min(hi, bisect_right(maximum))
+                else:
+                    hi = min(hi, bisect_left(maximum))
+    return (lo, hi)
+
 def filter_by_specs(specs, versions):
     for version in versions:
         if version_matches_specs(specs, version):
@@ -270,7 +500,7 @@ class PkgsEdgeVersions(dict):
     """
     def update(self, pkgsVersions):
         for pkg, versions in pkgsVersions.items():
-            if pkg not in self_map:
+            if pkg not in self:
                 self[pkg] = SortedSet()
             self[pkg].update(versions)
 
@@ -285,8 +515,526 @@ def retrieve_edge_versions(retrieve_fn, pkgEdges):
     }
 
 
+class PkgsDomains(dict):
+    """The candidate versions of each pkg: `pkg -> SortedSet[version]`.
+
+    A version stays a candidate only while each of its dependencies still has
+    a candidate that it accepts (arc consistency). The domains are narrowed
+    until nothing changes, both up front and every time a pkg is locked: the
+    locked pkg is narrowed to its version and its dependencies to the versions
+    that version accepts.
+
+    Versions which can never be part of a solution are thus removed without
+    any search. If a required pkg (the root, or a locked pkg) runs out of
+    candidates, `NotSolved` is raised.
+
+    Every change is recorded on a trail so that it can be undone when the
+    solver backtracks, see `mark` and `undo`.
+
+    How a set of versions is stored is left to a few small methods
+    (`_domain`, `_singleton`, `_contains`, `_supported`, `_removed`,
+    `_discard` and `_restore`) so that subclasses can use another
+    representation, see `PkgsDomainsBits`.
+    """
+
+    def __init__(self, pkgsVersionsDeps, root=None):
+        super(PkgsDomains, self).__init__()
+        self.pkgsVersionsDeps = pkgsVersionsDeps
+        self.required = set()
+        self.trail = []
+
+        # dep -> [(pkg, version, depVersions), ...] which have a requirement
+        # on dep
+        self.dependents = {}
+
+        for (pkg, pkgVersionsDeps) in pkgsVersionsDeps.items():
+            self[pkg] = self._domain(pkgVersionsDeps)
+
+        for (pkg, pkgVersionsDeps) in pkgsVersionsDeps.items():
+            for (version, depsVersions) in pkgVersionsDeps.items():
+                for (dep, depVersions) in depsVersions.items():
+                    if dep not in self:
+                        # Nothing is known about the dep's versions, so none
+                        # of them can be used.
+                        self[dep] = self._domain({})
+                    self.dependents.setdefault(dep, []).append(
+                        (pkg, version, depVersions))
+
+        if root is not None:
+            self.required.add(root)
+        self.propagate(list(self.keys()))
+
+    def candidates(self, pkg, versions=None):
+        """The candidates of pkg (restricted to versions), highest first."""
+        domain = self[pkg]
+        if versions is None:
+            return list(reversed(domain))
+        return [v for v in reversed(versions) if v in domain]
+
+    def is_candidate(self, pkg, version):
+        return pkg in self and self._contains(self[pkg], version)
+
+    def lock(self, pkg, version):
+        """Narrow the domains to the pkg being at version."""
+        if pkg not in self.required:
+            self.required.add(pkg)
+            self.trail.append((pkg, None))
+
+        changed = []
+        if self._restrict(pkg, self._singleton(version)):
+            changed.append(pkg)
+        for (dep, depVersions) in self.pkgsVersionsDeps[pkg][version].items():
+            if self._restrict(dep, depVersions):
+                changed.append(dep)
+        self.propagate(changed)
+
+    def propagate(self, pkgs):
+        """Remove the versions that lost their support, starting from the
+        dependents of pkgs (whose domains changed), until nothing changes.
+        """
+        queue = collections.deque(pkgs)
+        queued = set(queue)
+        while queue:
+            dep = queue.popleft()
+            queued.discard(dep)
+            depDomain = self[dep]
+
+            for (pkg, version, depVersions) in self.dependents.get(dep, ()):
+                if not self._contains(self[pkg], version):
+                    continue
+                if not self._supported(depDomain, depVersions):
+                    self._remove(pkg, self._singleton(version))
+                    if pkg not in queued:
+                        queue.append(pkg)
+                        queued.add(pkg)
+
+    def mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        """Undo every change made since mark was taken."""
+        trail = self.trail
+        while len(trail) > mark:
+            (pkg, removed) = trail.pop()
+            if removed is None:
+                self.required.discard(pkg)
+            else:
+                self._restore(pkg, removed)
+
+    def _restrict(self, pkg, versions):
+        removed = self._removed(self[pkg], versions)
+        if not removed:
+            return False
+        self._remove(pkg, removed)
+        return True
+
+    def _remove(self, pkg, removed):
+        self._discard(pkg, removed)
+        self.trail.append((pkg, removed))
+        if not self[pkg] and pkg in self.required:
+            raise NotSolved(pkg)
+
+    # The representation of a set of versions.
+
+    def _domain(self, pkgVersionsDeps):
+        return SortedSet(pkgVersionsDeps.keys())
+
+    @staticmethod
+    def _singleton(version):
+        return (version,)
+
+    @staticmethod
+    def _contains(domain, version):
+        return version in domain
+
+    @staticmethod
+    def _supported(domain, versions):
+        return not domain.isdisjoint(versions)
+
+    @staticmethod
+    def _removed(domain, versions):
+        return domain.difference(versions)
+
+    def _discard(self, pkg, removed):
+        self[pkg].difference_update(removed)
+
+    def _restore(self, pkg, removed):
+        self[pkg].update(removed)
+
+
+# Sets of version indexes, stored as the bits of a plain int (a long once it
+# grows past a machine word on Python 2): bit i is set when the version with
+# index i (in the sorted versions of the pkg, see `PkgsVersionsDepsBits`) is
+# in the set. Intersections and differences are plain bitwise operations.
+
+def bits_from_indexes(indexes):
+    """Return the bits of a set of version indexes."""
+    bits = 0
+    for index in indexes:
+        bits |= 1 << index
+    return bits
+
+
+def bits_contains(bits, index):
+    return index is not None and index >= 0 and (bits >> index) & 1 == 1
+
+
+def bits_indexes(bits):
+    """Yield the indexes set in bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def bits_indexes_reversed(bits):
+    """Yield the indexes set in bits, highest first."""
+    while bits:
+        index = bits.bit_length() - 1
+        yield index
+        bits ^= 1 << index
+
+
+def bits_count(bits):
+    return bin(bits).count('1')
+
+
+class PkgsVersionsDepsBits(dict):
+    """A `PkgsVersionsDepsVersions` with the versions of each pkg numbered.
+
+    `pkg -> {index: {dep: bits}}`, where index i of a pkg stands for
+    ``versions[pkg][i]`` (the versions of a pkg are sorted, so that the
+    highest version has the highest index). Membership, intersection and
+    emptiness tests of the accepted versions are then bitwise operations on
+    a few machine words instead of lookups in a `SortedSet` of `Version`.
+
+    Accepted versions of a dep which are not one of its known versions are
+    dropped: they could never be locked anyway.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PkgsVersionsDepsBits, self).__init__(*args, **kwargs)
+        # pkg -> [version, ...], sorted
+        self.versions = {}
+        # pkg -> {version: index}
+        self.indexes = {}
+
+    @classmethod
+    def from_versions(cls, pkgsVersionsDeps):
+        """Convert a `PkgsVersionsDepsVersions`."""
+        pkgsBits = cls()
+        for (pkg, pkgVersionsDeps) in pkgsVersionsDeps.items():
+            pkgsBits._number(pkg, pkgVersionsDeps.keys())
+        for pkgVersionsDeps in pkgsVersionsDeps.values():
+            for depsVersions in pkgVersionsDeps.values():
+                for dep in depsVersions:
+                    if dep not in pkgsBits.versions:
+                        pkgsBits._number(dep, ())
+
+        for (pkg, pkgVersionsDeps) in pkgsVersionsDeps.items():
+            indexes = pkgsBits.indexes[pkg]
+            pkgsBits[pkg] = {
+                indexes[version]: {
+                    dep: pkgsBits.to_bits(dep, depVersions)
+                    for (dep, depVersions) in depsVersions.items()
+                }
+                for (version, depsVersions) in pkgVersionsDeps.items()
+            }
+        return pkgsBits
+
+    def to_versions(self):
+        """Convert back to a `PkgsVersionsDepsVersions`."""
+        pkgsVersionsDeps = PkgsVersionsDepsVersions()
+        for (pkg, pkgIndexesDeps) in self.items():
+            versions = self.versions[pkg]
+            pkgsVersionsDeps[pkg] = {
+                versions[index]: {
+                    dep: SortedSet(self.from_bits(dep, depBits))
+                    for (dep, depBits) in depsBits.items()
+                }
+                for (index, depsBits) in pkgIndexesDeps.items()
+            }
+        return pkgsVersionsDeps
+
+    def to_bits(self, pkg, versions):
+        indexes = self.indexes[pkg]
+        return bits_from_indexes(
+            indexes[version] for version in versions if version in indexes)
+
+    def from_bits(self, pkg, bits):
+        versions = self.versions[pkg]
+        return [versions[index] for index in bits_indexes(bits)]
+
+    def to_locked(self, pkgsLockedIndexes):
+        """Convert the result of a solve back to versions."""
+        return {
+            pkg: None if index is None else self.versions[pkg][index]
+            for (pkg, index) in pkgsLockedIndexes.items()
+        }
+
+    def from_locked(self, pkgsLocked):
+        return {
+            pkg: self.indexes.get(pkg, {}).get(version)
+            for (pkg, version) in pkgsLocked.items()
+        }
+
+    def solve(self, root, pkgsLockedHint=None):
+        """Same as `solve`, returning versions (not indexes)."""
+        if pkgsLockedHint is not None:
+            pkgsLockedHint = self.from_locked(pkgsLockedHint)
+        state = BitsState(self, root, pkgsLockedHint)
+        state.attempt_pkg_traversal(root)
+        return self.to_locked(state.pkgsLocked)
+
+    def _number(self, pkg, versions):
+        versions = sorted(versions)
+        self.versions[pkg] = versions
+        self.indexes[pkg] = {
+            version: index for (index, version) in enumerate(versions)
+        }
+
+
+class PkgsDomainsBits(PkgsDomains):
+    """`PkgsDomains` over a `PkgsVersionsDepsBits`: the domain of each pkg
+    is a plain int with a bit set for each of its candidate indexes.
+    """
+
+    def candidates(self, pkg, versions=None):
+        domain = self[pkg]
+        if versions is not None:
+            domain &= versions
+        return list(bits_indexes_reversed(domain))
+
+    def _domain(self, pkgIndexesDeps):
+        return bits_from_indexes(pkgIndexesDeps.keys())
+
+    @staticmethod
+    def _singleton(index):
+        return 1 << index
+
+    @staticmethod
+    def _contains(domain, index):
+        return bits_contains(domain, index)
+
+    @staticmethod
+    def _supported(domain, bits):
+        return domain & bits != 0
+
+    @staticmethod
+    def _removed(domain, bits):
+        return domain & ~bits
+
+    def _discard(self, pkg, removed):
+        self[pkg] &= ~removed
+
+    def _restore(self, pkg, removed):
+        self[pkg] |= removed
+
+
+class EdgeDiscovery(object):
+    """Discover the dependency graph by retrieving edges until a fixpoint.
+
+    ``retrieve_fn(pkg, edges)`` returns the versions of pkg that the server
+    has for the edges, with their dependencies: ``{version: {dep: specs}}``.
+    The dependencies declare new edges, which are retrieved in the next
+    round. Each round only requests the edges (of new pkgs, or tighter ones
+    of known pkgs) which were never requested before.
+
+    The number of rounds, requests and versions retrieved are kept in
+    `rounds`, `requests` and `versionsTransferred`.
+    """
+
+    def __init__(self, retrieve_fn):
+        self.retrieve_fn = retrieve_fn
+        self.pkgsVersionsSpecs = {}
+        self.pkgsEdges = PkgsEdges()
+        self.pkgsEdgesRequested = {}
+        self.pkgsEdgeVersions = PkgsEdgeVersions()
+        self.rounds = 0
+        self.requests = 0
+        self.versionsTransferred = 0
+
+    def update(self, pkgsVersionsSpecs):
+        """Add known specs, i.e. the ones of the root."""
+        for (pkg, pkgVersionsSpecs) in pkgsVersionsSpecs.items():
+            self.pkgsVersionsSpecs.setdefault(pkg, {}).update(pkgVersionsSpecs)
+        self.pkgsEdges.update(pkgsVersionsSpecs)
+
+    def pending(self):
+        """Return the edges which were not requested yet: `pkg -> Edges`."""
+        pending = {}
+        for (pkg, edges) in self.pkgsEdges.items():
+            requested = self.pkgsEdgesRequested.get(pkg)
+            if requested is not None:
+                edges = edges.difference(requested)
+            if edges:
+                pending[pkg] = edges
+        return pending
+
+    def step(self):
+        """Run one round. Return False once there was nothing to request."""
+        pending = self.pending()
+        if not pending:
+            return False
+
+        self.rounds += 1
+        retrieved = {}
+        for (pkg, edges) in pending.items():
+            retrieved[pkg] = self.retrieve_fn(pkg, edges)
+            self.requests += 1
+            self.versionsTransferred += len(retrieved[pkg])
+
+            if pkg not in self.pkgsEdgesRequested:
+                self.pkgsEdgesRequested[pkg] = Edges()
+            self.pkgsEdgesRequested[pkg].extend(edges)
+
+        self.pkgsEdgeVersions.update(retrieved)
+        self.update(retrieved)
+        return True
+
+    def run(self):
+        """Retrieve edges until no new ones are found."""
+        while self.step():
+            pass
+        return self.pkgsVersionsSpecs
+
+    def pkgs_versions_deps(self, root):
+        """Reduce what was discovered to concrete versions, for `solve`."""
+        pkgsVersionsDeps = PkgsVersionsDepsVersions()
+        pkgsVersionsDeps.filter_update(root, self.pkgsVersionsSpecs, self.pkgsEdgeVersions)
+        return pkgsVersionsDeps
+
+
+class WireEncoder(object):
+    """Encode batched edge requests and responses as JSON Lines.
+
+    Version and spec strings are interned: the first time one is used it is
+    defined on a line of its own (``["v", "1.2.3"]`` or ``["s", ">=1.2"]``)
+    and it is referred to by its index afterwards.
+
+    - A request is one ``["e", pkg, [lt...], [gte...]]`` line per pkg, with
+      the versions of its `Edges`.
+    - A response is one ``["p", pkg, [[version, [[dep, [spec...]]...]]...]]``
+      line per pkg, with its versions and their dependencies' specs.
+
+    Lines are produced one pkg at a time, so a large batch is never held in
+    memory as a whole. Use one encoder (and `WireDecoder`) per stream.
+    """
+
+    def __init__(self):
+        self.versions = {}
+        self.specs = {}
+
+    def encode_request(self, pkgsEdges):
+        for (pkg, edges) in _items(pkgsEdges):
+            defines = []
+            lt = [self._intern(self.versions, 'v', str(req.version), defines) for req in edges.reqs_lt]
+            gte = [self._intern(self.versions, 'v', str(req.version), defines) for req in edges.reqs_gte]
+            for line in defines:
+                yield line
+            yield _dump_line(['e', pkg, lt, gte])
+
+    def encode_response(self, pkgsVersionsSpecs):
+        for (pkg, pkgVersionsSpecs) in _items(pkgsVersionsSpecs):
+            defines = []
+            versions = [
+                [
+                    self._intern(self.versions, 'v', str(version), defines),
+                    [
+                        [dep, [self._intern(self.specs, 's', str(spec), defines) for spec in specs]]
+                        for (dep, specs) in depsSpecs.items()
+                    ],
+                ]
+                for (version, depsSpecs) in pkgVersionsSpecs.items()
+            ]
+            for line in defines:
+                yield line
+            yield _dump_line(['p', pkg, versions])
+
+    @staticmethod
+    def _intern(table, kind, value, defines):
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+            defines.append(_dump_line([kind, value]))
+        return index
+
+
+class WireDecoder(object):
+    """Decode the lines written by `WireEncoder`."""
+
+    def __init__(self):
+        self.versions = []
+        self.specs = []
+
+    def decode_request(self, lines):
+        """Yield ``(pkg, Edges)`` for each pkg of a request."""
+        for (pkg, lt, gte) in self._records(lines, 'e'):
+            edges = Edges()
+            edges.reqs_lt.update(EdgeLt(self.versions[i]) for i in lt)
+            edges.reqs_gte.update(EdgeGte(self.versions[i]) for i in gte)
+            yield (pkg, edges)
+
+    def decode_response(self, lines):
+        """Yield ``(pkg, {version: {dep: specs}})`` for each pkg of a response."""
+        versions = self.versions
+        specs = self.specs
+        for (pkg, pkgVersionsSpecs) in self._records(lines, 'p'):
+            yield (pkg, {
+                versions[version]: {
+                    dep: [specs[i] for i in depSpecs]
+                    for (dep, depSpecs) in depsSpecs
+                }
+                for (version, depsSpecs) in pkgVersionsSpecs
+            })
+
+    def _records(self, lines, kind):
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record[0] == 'v':
+                self.versions.append(base.Version.parse(record[1]))
+            elif record[0] == 's':
+                self.specs.append(base.Spec.from_str(record[1]))
+            elif record[0] == kind:
+                yield record[1:]
+            else:
+                raise ValueError("Unexpected record: %r" % line)
+
+
+def _items(pkgsMap):
+    if isinstance(pkgsMap, dict):
+        return pkgsMap.items()
+    return pkgsMap
+
+
+def _dump_line(record):
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def encode_request(pkgsEdges):
+    """Encode ``{pkg: Edges}`` (or ``(pkg, Edges)`` pairs) as lines."""
+    return WireEncoder().encode_request(pkgsEdges)
+
+
+def encode_response(pkgsVersionsSpecs):
+    """Encode ``{pkg: {version: {dep: specs}}}`` (or pairs) as lines."""
+    return WireEncoder().encode_response(pkgsVersionsSpecs)
+
+
+def decode_request(lines):
+    return WireDecoder().decode_request(lines)
+
+
+def decode_response(lines):
+    return WireDecoder().decode_response(lines)
+
+
 class State(object):
-    def __init__(self, pkgsVersionsDeps):
+    domainsClass = PkgsDomains
+
+    def __init__(self, pkgsVersionsDeps, root=None, pkgsLockedHint=None):
         self.pkgsVersionsDeps = pkgsVersionsDeps
         self.pkgsLocked = {
             pkg: None for pkg in pkgsVersionsDeps.keys()
@@ -294,6 +1042,16 @@ class State(object):
         self.failedVersions = {
             pkg: set() for pkg in pkgsVersionsDeps.keys()
         }
+        # the order pkgs were locked in, so that backtracking can unlock them
+        self.lockedOrder = []
+        # number of pkg versions whose dependencies were traversed
+        self.explored = 0
+        self.pkgsDomains = self.domainsClass(pkgsVersionsDeps, root)
+
+        self.pkgsHinted = {}
+        self.pkgsAffected = set()
+        if pkgsLockedHint is not None:
+            self._load_hint(pkgsLockedHint)
 
     def attempt_pkg_traversal(self, pkg):
         lockedVersion = self.pkgsLocked[pkg]
@@ -302,28 +1060,38 @@ class State(object):
             self.attempt_pkgVersion_traversal(pkg, lockedVersion)
             return  # no error == success
 
-        for pkgVersion in self.pkgsVersionsDeps[pkg].keys():
+        for pkgVersion in self._candidates(pkg):
             if pkgVersion in self.failedVersions[pkg]:
                 continue
 
-            assert self.pkgsLocked[pkg] == None
-            self.pkgsLocked[pkg] = pkgVersion
+            mark = self._mark()
             try:
+                self._lock(pkg, pkgVersion)
                 self.attempt_pkgVersion_traversal(pkg, pkgVersion)
                 return  # this pkgVersion combination was successful
             except NotSolved:
-                self._handle_not_solved()
+                self._handle_not_solved(pkg, pkgVersion, mark)
 
-        raise NotSolved()
+        raise NotSolved(pkg)
 
     def attempt_pkgVersion_traversal(self, pkg, pkgVersion):
+        if self._keeps_hint(pkg, pkgVersion):
+            mark = self._mark()
+            try:
+                self._lock_hinted(pkg)
+                return
+            except NotSolved:
+                # Fall back to searching.
+                self._rollback(mark)
+
+        self.explored += 1
         depsVersions = self.pkgsVersionsDeps[pkg][pkgVersion]
-        lockedHere = []
+        mark = self._mark()
 
         for dep, depVersions in depsVersions.items():
             lockedDepVersion = self.pkgsLocked[dep]
             if lockedDepVersion is not None:
-                if lockedDepVersion in depVersions:
+                if self.pkgsDomains._contains(depVersions, lockedDepVersion):
                     # One of our dependencies was locked, and we can use the
                     # locked version.
                     #
@@ -331,25 +1099,28 @@ class State(object):
                     # at this version.
                     continue
                 else:
-                    raise NotSolved()
+                    self._rollback(mark)
+                    raise NotSolved(dep)
 
-            for depVersion in reversed(depVersions):
+            # Only the versions that survived propagation are tried.
+            for depVersion in self._candidates(dep, depVersions):
                 if depVersion in self.failedVersions[dep]:
                     continue
 
-                self.pkgsLocked[dep] = depVersion
+                depMark = self._mark()
                 try:
+                    self._lock(dep, depVersion)
                     self.attempt_pkg_traversal(dep)
-                    lockedHere.append(dep)
                     break
                 except NotSolved:
-                    self._handle_not_solved(dep, depVersion)
+                    self._handle_not_solved(dep, depVersion, depMark)
             else:
                 # `for...else` The `break` was never hit, the dependency was
                 # never solved.
                 #
                 # The dependency was not solved by us. Make sure we clean up
-                # all the dependencies we locked and add them to failed
+                # everything we locked (and everything that was narrowed
+                # because of those locks).
                 #
                 # TODO: should I add to the failedVersions all versions we
                 # locked?
@@ -362,11 +1133,87 @@ class State(object):
                 # Honestly I was looking for a piece of code that _didn't_
                 # set failedVersions, letting us try out combinations... this
                 # is it!
-                for dep in lockedHere:
-                    self.pkgsLocked[dep] = None
-                raise NotSolved()
+                self._rollback(mark)
+                raise NotSolved(dep)
+
+    def _load_hint(self, pkgsLockedHint):
+        """Find which of the hinted versions can be kept.
+
+        A pkg is affected if the hinted version of one of its dependencies is
+        gone or no longer accepted, or if any of its (hinted) dependencies is
+        affected. The hinted versions of all the other pkgs still form a
+        solution for everything below them.
+        """
+        self.pkgsHinted = {
+            pkg: version for (pkg, version) in pkgsLockedHint.items()
+            if version is not None and self.pkgsDomains.is_candidate(pkg, version)
+        }
 
-    def _handle_not_solved(self, pkg, pkgVersion):
-        self.pkgsLocked[pkg] = None
+        # dep -> pkgs which depend on it through their hinted version
+        hintedDependents = {}
+        queue = collections.deque()
+        for (pkg, version) in self.pkgsHinted.items():
+            for (dep, depVersions) in self.pkgsVersionsDeps[pkg][version].items():
+                hintedDependents.setdefault(dep, []).append(pkg)
+                if not self.pkgsDomains._contains(depVersions, self.pkgsHinted.get(dep)):
+                    queue.append(pkg)
+
+        affected = self.pkgsAffected
+        while queue:
+            pkg = queue.popleft()
+            if pkg in affected:
+                continue
+            affected.add(pkg)
+            queue.extend(hintedDependents.get(pkg, ()))
+
+    def _candidates(self, pkg, versions=None):
+        candidates = self.pkgsDomains.candidates(pkg, versions)
+        hinted = self.pkgsHinted.get(pkg)
+        if hinted is not None and hinted in candidates:
+            candidates.remove(hinted)
+            candidates.insert(0, hinted)
+        return candidates
+
+    def _keeps_hint(self, pkg, pkgVersion):
+        return (
+            self.pkgsHinted.get(pkg) == pkgVersion
+            and pkg not in self.pkgsAffected
+        )
+
+    def _lock_hinted(self, pkg):
+        """Lock everything below pkg to its hinted version, without search."""
+        stack = [pkg]
+        while stack:
+            pkg = stack.pop()
+            depsVersions = self.pkgsVersionsDeps[pkg][self.pkgsLocked[pkg]]
+            for (dep, depVersions) in depsVersions.items():
+                lockedDepVersion = self.pkgsLocked[dep]
+                if lockedDepVersion is None:
+                    self._lock(dep, self.pkgsHinted[dep])
+                    stack.append(dep)
+                elif not self.pkgsDomains._contains(depVersions, lockedDepVersion):
+                    raise NotSolved(dep)
+
+    def _mark(self):
+        return (len(self.lockedOrder), self.pkgsDomains.mark())
+
+    def _lock(self, pkg, pkgVersion):
+        """Lock the pkg and propagate, raising NotSolved on a conflict."""
+        self.pkgsLocked[pkg] = pkgVersion
+        self.lockedOrder.append(pkg)
+        self.pkgsDomains.lock(pkg, pkgVersion)
+
+    def _rollback(self, mark):
+        (lockedCount, domainsMark) = mark
+        while len(self.lockedOrder) > lockedCount:
+            self.pkgsLocked[self.lockedOrder.pop()] = None
+        self.pkgsDomains.undo(domainsMark)
+
+    def _handle_not_solved(self, pkg, pkgVersion, mark):
+        self._rollback(mark)
         self.failedVersions[pkg].add(pkgVersion)
 
+
+class BitsState(State):
+    """`State` over a `PkgsVersionsDepsBits`: versions are indexes."""
+    domainsClass = PkgsDomainsBits
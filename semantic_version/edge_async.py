@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""asyncio variants of the edge retrieval helpers.
+
+This module needs Python 3.5+; ``import semantic_version`` doesn't load it.
+"""
+
+import asyncio
+
+
+class AsyncEdgeRetriever(object):
+    """Retrieve edge versions concurrently with a coroutine retrieve_fn.
+
+    At most limit calls to ``retrieve_fn(pkg, edges)`` are awaited at once.
+    Requests for a pkg and edges which are already in flight wait for that
+    call instead of making a new one.
+    """
+
+    def __init__(self, retrieve_fn, limit=10):
+        self.retrieve_fn = retrieve_fn
+        self.limit = limit
+        self.semaphore = None
+        self.inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def retrieve_edge_versions(self, pkgEdges):
+        """Same as `edge.retrieve_edge_versions`."""
+        pkgs = list(pkgEdges.keys())
+        versions = await asyncio.gather(*[
+            self.retrieve(pkg, pkgEdges[pkg]) for pkg in pkgs
+        ])
+        return dict(zip(pkgs, versions))
+
+    async def retrieve(self, pkg, edges):
+        key = (pkg, edges.key())
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._retrieve(pkg, edges))
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the call other callers wait on.
+        return await asyncio.shield(future)
+
+    async def _retrieve(self, pkg, edges):
+        if self.semaphore is None:
+            # Created here so that it belongs to the running loop.
+            self.semaphore = asyncio.Semaphore(self.limit)
+        async with self.semaphore:
+            self.calls += 1
+            return await self.retrieve_fn(pkg, edges)
+
+
+async def retrieve_edge_versions(retrieve_fn, pkgEdges, limit=10):
+    """Retrieve the edges from the server, returning the versions.
+
+    Like `edge.retrieve_edge_versions`, but retrieve_fn is a coroutine
+    function and up to limit pkgs are retrieved concurrently.
+    """
+    retriever = AsyncEdgeRetriever(retrieve_fn, limit)
+    return await retriever.retrieve_edge_versions(pkgEdges)
+
+
+def cached(cache, retrieve_fn, token_fn=None):
+    """Put an `edge_cache.RetrievalCache` in front of a coroutine retrieve_fn.
+
+    Same as `RetrievalCache.wrap`. token_fn and the cache's revalidate
+    callback can be coroutine functions, which are awaited; plain functions
+    are run in the loop's default executor, so that other retrievals go on
+    meanwhile.
+    """
+    async def retrieve(pkg, edges):
+        (versions, token) = cache.lookup(pkg, edges)
+        if token is not None:
+            current = await _call(cache.revalidate, pkg, token)
+            versions = cache.confirm(pkg, edges, current)
+        if versions is None:
+            token = None if token_fn is None else await _call(token_fn, pkg)
+            versions = await retrieve_fn(pkg, edges)
+            cache.put(pkg, edges, versions, token)
+        return versions
+    return retrieve
+
+
+async def _call(fn, *args):
+    if asyncio.iscoroutinefunction(fn):
+        return await fn(*args)
+    return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Caches for the edge solving system."""
+
+import collections
+import json
+import sqlite3
+import time
+
+from . import base
+from . import edge
+
+
+class SolveCache(object):
+    """A persistent cache of `edge.solve` results, stored in SQLite.
+
+    Results are keyed by `edge.fingerprint` of the inputs. Once the stored
+    results take more than maxSize bytes, the least recently used ones are
+    evicted. They are stored as JSON, so the pkgs must be strings.
+
+    The number of hits and misses since the cache was opened are available
+    through `stats`.
+    """
+
+    def __init__(self, path, maxSize=64 * 1024 * 1024):
+        self.path = path
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS solved ("
+                " fingerprint TEXT PRIMARY KEY,"
+                " locked TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS solved_used ON solved (used)"
+            )
+
+    def solve(self, pkgsVersionsDeps, root, pkgsLockedHint=None):
+        """`edge.solve`, returning the stored result on a hit.
+
+        Results solved with a pkgsLockedHint are stored apart from the others.
+        """
+        key = edge.fingerprint(pkgsVersionsDeps, root, pkgsLockedHint)
+        pkgsLocked = self.get(key)
+        if pkgsLocked is None:
+            pkgsLocked = edge.solve(pkgsVersionsDeps, root, pkgsLockedHint)
+            self.put(key, pkgsLocked)
+        return pkgsLocked
+
+    def get(self, key):
+        """Return the stored pkgsLocked for the fingerprint, or None."""
+        row = self.connection.execute(
+            "SELECT locked FROM solved WHERE fingerprint = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.connection:
+            self.connection.execute(
+                "UPDATE solved SET used = ? WHERE fingerprint = ?", (time.time(), key)
+            )
+        return {
+            pkg: None if version is None else base.Version.parse(version)
+            for (pkg, version) in json.loads(row[0])
+        }
+
+    def put(self, key, pkgsLocked):
+        locked = json.dumps(sorted(
+            [pkg, None if version is None else str(version)]
+            for (pkg, version) in pkgsLocked.items()
+        ))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solved (fingerprint, locked, size, used)"
+                " VALUES (?, ?, ?, ?)",
+                (key, locked, len(locked), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        (size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM solved"
+        ).fetchone()
+        if size <= self.maxSize:
+            return
+
+        rows = self.connection.execute(
+            "SELECT fingerprint, size FROM solved ORDER BY used"
+        ).fetchall()
+        evicted = []
+        for (key, rowSize) in rows:
+            if size <= self.maxSize:
+                break
+            evicted.append((key,))
+            size -= rowSize
+        self.connection.executemany("DELETE FROM solved WHERE fingerprint = ?", evicted)
+
+    def stats(self):
+        (entries, size) = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM solved"
+        ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'size': size,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+class RetrievalCache(object):
+    """An in-memory cache of edge retrievals, keyed by pkg and `Edges.key`.
+
+    Entries expire ttl seconds after they were stored (never if ttl is
+    None), and only the maxSize most recently used entries are kept.
+
+    An entry can be stored with a token identifying the pkg's state on the
+    server (i.e. an ETag). Once it expires, ``revalidate(pkg, token)`` is
+    asked whether it is still current instead of retrieving it again.
+
+    Use `wrap` (or `edge_async.cached` for coroutines) to put the cache in
+    front of a ``retrieve_fn``.
+    """
+
+    def __init__(self, maxSize=1024, ttl=None, revalidate=None, clock=time.time):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.clock = clock
+        # (pkg, edges key) -> [versions, token, expires]
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    def get(self, pkg, edges):
+        """Return the cached versions, or None."""
+        (versions, token) = self.lookup(pkg, edges)
+        if token is not None:
+            versions = self.confirm(pkg, edges, self.revalidate(pkg, token))
+        return versions
+
+    def lookup(self, pkg, edges):
+        """The first half of `get`, which doesn't call revalidate.
+
+        Return ``(versions, None)``, versions being None on a miss, or
+        ``(None, token)`` when the entry expired and has to be revalidated:
+        then pass the result of ``revalidate(pkg, token)`` to `confirm`.
+        """
+        key = (pkg, edges.key())
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return (None, None)
+
+        (versions, token, expires) = entry
+        self.entries[key] = entry
+        if expires is not None and self.clock() >= expires:
+            if self.revalidate is None or token is None:
+                del self.entries[key]
+                self.misses += 1
+                return (None, None)
+            return (None, token)
+
+        self.hits += 1
+        return (versions, None)
+
+    def confirm(self, pkg, edges, current):
+        """The second half of `get`: return the versions of the expired entry
+        if current (it was revalidated), else drop it and return None.
+        """
+        key = (pkg, edges.key())
+        entry = self.entries.pop(key, None)
+        if entry is None or not current:
+            self.misses += 1
+            return None
+
+        entry[2] = self._expires()
+        self.entries[key] = entry
+        self.revalidated += 1
+        self.hits += 1
+        return entry[0]
+
+    def put(self, pkg, edges, versions, token=None):
+        key = (pkg, edges.key())
+        self.entries.pop(key, None)
+        self.entries[key] = [versions, token, self._expires()]
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _expires(self):
+        if self.ttl is None:
+            return None
+        return self.clock() + self.ttl
+
+    def wrap(self, retrieve_fn, token_fn=None):
+        """Return a cached version of ``retrieve_fn(pkg, edges)``.
+
+        token_fn(pkg), if given, provides the token stored with the
+        retrieved versions.
+        """
+        def retrieve(pkg, edges):
+            versions = self.get(pkg, edges)
+            if versions is None:
+                token = None if token_fn is None else token_fn(pkg)
+                versions = retrieve_fn(pkg, edges)
+                self.put(pkg, edges, versions, token)
+            return versions
+        return retrieve
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return float(self.hits) / lookups
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'hit_rate': self.hit_rate(),
+        }
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""A compact, frozen form of the dependency graph that the solver runs on.
+
+The nested ``pkg -> version -> dep -> versions`` dicts repeat the pkg names
+and `Version` objects everywhere and hash a `Version` at each lookup. A
+`CompactGraph` interns both to dense ints and stores the adjacency in flat
+(CSR) arrays instead.
+
+A graph can be written to a binary snapshot (`CompactGraph.dump`), which
+`load` maps in memory as a `SnapshotGraph`: nothing is deserialized up
+front, so many worker processes can solve from the same file and share its
+pages. Snapshots need Python 3.
+
+A snapshot can also be published in shared memory (`publish`) for worker
+processes to `attach` to, which needs Python 3.8.
+"""
+
+import array
+import bisect
+import io
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    # Python 2
+    from collections import Mapping
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    # Python < 3.8
+    shared_memory = None
+
+from . import base
+from . import edge
+
+
+class CompactGraph(Mapping):
+    """A frozen, integer indexed `PkgsVersionsDepsVersions`.
+
+    Pkg ids index `pkgs` (the sorted pkg names). The versions of pkg id p are
+    ``versions[versionOffsets[p]:versionOffsets[p + 1]]``, sorted; version
+    index i of p is the node ``versionOffsets[p] + i``. The dependencies of
+    node n are the edges ``depOffsets[n]:depOffsets[n + 1]``: edge e requires
+    pkg id ``depPkgs[e]`` at one of the version indexes set in ``depBits[e]``.
+
+    Pkgs which only appear as dependencies (nothing is known about their
+    versions) have no versions and ``known[p] == 0``.
+
+    The fields only need to be sequences, so that `SnapshotGraph` can read
+    them from a buffer.
+
+    As a mapping it looks like a `PkgsVersionsDepsBits` keyed by pkg ids:
+    ``graph[p][i][d]`` is the bits of the versions of d accepted by version i of p,
+    so the solver runs on it as it is, see `solve`.
+    """
+    __slots__ = (
+        'pkgs', 'known', 'knownCount',
+        'versionOffsets', 'versions',
+        'depOffsets', 'depPkgs', 'depBits',
+    )
+
+    def __init__(self, pkgs, known, versionOffsets, versions, depOffsets, depPkgs, depBits):
+        known = array.array('B', known)
+        self._init(
+            tuple(pkgs),
+            known,
+            sum(known),
+            versionOffsets,
+            tuple(versions),
+            depOffsets,
+            depPkgs,
+            tuple(depBits),
+        )
+
+    def _init(self, pkgs, known, knownCount, versionOffsets, versions, depOffsets, depPkgs, depBits):
+        self.pkgs = pkgs
+        self.known = known
+        self.knownCount = knownCount
+        self.versionOffsets = versionOffsets
+        self.versions = versions
+        self.depOffsets = depOffsets
+        self.depPkgs = depPkgs
+        # last: the graph is frozen from here on, see __setattr__
+        self.depBits = depBits
+
+    @classmethod
+    def from_versions(cls, pkgsVersionsDeps):
+        """Convert a `PkgsVersionsDepsVersions`."""
+        return cls.from_bits(edge.PkgsVersionsDepsBits.from_versions(pkgsVersionsDeps))
+
+    @classmethod
+    def from_bits(cls, pkgsBits):
+        """Convert a `PkgsVersionsDepsBits`."""
+        pkgs = sorted(pkgsBits.versions)
+        pkgIds = {pkg: p for (p, pkg) in enumerate(pkgs)}
+
+        known = bytearray(len(pkgs))
+        versionOffsets = array.array('i', [0])
+        versions = []
+        depOffsets = array.array('i', [0])
+        depPkgs = array.array('i')
+        depBits = []
+        for (p, pkg) in enumerate(pkgs):
+            pkgIndexesDeps = pkgsBits.get(pkg)
+            if pkgIndexesDeps is not None:
+                known[p] = 1
+            else:
+                pkgIndexesDeps = {}
+
+            for (index, version) in enumerate(pkgsBits.versions[pkg]):
+                versions.append(version)
+                depsBits = pkgIndexesDeps.get(index, {})
+                for dep in sorted(depsBits, key=pkgIds.get):
+                    depPkgs.append(pkgIds[dep])
+                    depBits.append(depsBits[dep])
+                depOffsets.append(len(depPkgs))
+            versionOffsets.append(len(versions))
+
+        return cls(pkgs, known, versionOffsets, versions, depOffsets, depPkgs, depBits)
+
+    def to_bits(self):
+        """Convert back to a `PkgsVersionsDepsBits`."""
+        pkgsBits = edge.PkgsVersionsDepsBits()
+        for (p, pkg) in enumerate(self.pkgs):
+            pkgsBits._number(pkg, self.pkg_versions(p))
+        for p in self:
+            pkgsBits[self.pkgs[p]] = {
+                index: {
+                    self.pkgs[dep]: depBits
+                    for (dep, depBits) in deps.items()
+                }
+                for (index, deps) in self[p].items()
+            }
+        return pkgsBits
+
+    def to_versions(self):
+        """Convert back to a `PkgsVersionsDepsVersions`."""
+        return self.to_bits().to_versions()
+
+    def dump(self, fileobj):
+        """Write the graph as a binary snapshot, see `load`."""
+        pkgs = [pkg.encode('utf-8') for pkg in self.pkgs]
+        versions = [str(version).encode('utf-8') for version in self.versions]
+        bits = [
+            int(depBits).to_bytes((depBits.bit_length() + 7) // 8, 'little')
+            for depBits in self.depBits
+        ]
+        sections = [
+            self.known,
+            _blob_offsets(pkgs), b''.join(pkgs),
+            array.array('i', self.versionOffsets),
+            _blob_offsets(versions), b''.join(versions),
+            array.array('i', self.depOffsets),
+            array.array('i', self.depPkgs),
+            _blob_offsets(bits), b''.join(bits),
+        ]
+        sections = [memoryview(section).cast('B') for section in sections]
+
+        header = [len(self.pkgs), len(self.versions), len(self.depPkgs), self.knownCount]
+        offset = _align(len(SNAPSHOT_MAGIC) + SNAPSHOT_HEADER.size)
+        for section in sections:
+            header.extend([offset, len(section)])
+            offset = _align(offset + len(section))
+
+        fileobj.write(SNAPSHOT_MAGIC)
+        fileobj.write(SNAPSHOT_HEADER.pack(*header))
+        written = len(SNAPSHOT_MAGIC) + SNAPSHOT_HEADER.size
+        for (i, section) in enumerate(sections):
+            offset = header[4 + 2 * i]
+            fileobj.write(b'\0' * (offset - written))
+            fileobj.write(section)
+            written = offset + len(section)
+
+    def pkg_id(self, pkg):
+        """The id of pkg, or None."""
+        p = bisect.bisect_left(self.pkgs, pkg)
+        if p < len(self.pkgs) and self.pkgs[p] == pkg:
+            return p
+        return None
+
+    def pkg_versions(self, p):
+        return self.versions[self.versionOffsets[p]:self.versionOffsets[p + 1]]
+
+    def version_index(self, p, version):
+        """The index of version in the versions of pkg id p, or None."""
+        lo = self.versionOffsets[p]
+        hi = self.versionOffsets[p + 1]
+        node = bisect.bisect_left(self.versions, version, lo, hi)
+        if node < hi and self.versions[node] == version:
+            return node - lo
+        return None
+
+    def filter(self, pkg, specs):
+        """The versions of pkg which match all specs, lowest first.
+
+        The versions are bisected (see `edge.specs_range`), so only the ones
+        within the bounds of the specs are parsed (for a snapshot) and
+        matched.
+        """
+        return list(self._filter(pkg, specs, reverse=False))
+
+    def select(self, pkg, specs):
+        """The highest version of pkg which matches all specs, or None."""
+        return next(self._filter(pkg, specs, reverse=True), None)
+
+    def _filter(self, pkg, specs, reverse):
+        p = self.pkg_id(pkg)
+        if p is None:
+            return iter(())
+        versions = self.versions
+        start = self.versionOffsets[p]
+        end = self.versionOffsets[p + 1]
+        (lo, hi) = edge.specs_range(
+            specs,
+            lambda version: bisect.bisect_left(versions, version, start, end),
+            lambda version: bisect.bisect_right(versions, version, start, end),
+            start,
+            end,
+        )
+        nodes = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+        return edge.filter_by_specs(specs, (versions[n] for n in nodes))
+
+    def to_locked(self, pkgsLockedIndexes):
+        """Convert the result of a solve back to names and versions."""
+        return {
+            self.pkgs[p]: None if index is None else self.versions[self.versionOffsets[p] + index]
+            for (p, index) in pkgsLockedIndexes.items()
+        }
+
+    def from_locked(self, pkgsLocked):
+        pkgsLockedIndexes = {}
+        for (pkg, version) in pkgsLocked.items():
+            p = self.pkg_id(pkg)
+            if p is not None and version is not None:
+                pkgsLockedIndexes[p] = self.version_index(p, version)
+        return pkgsLockedIndexes
+
+    def reachable(self, p):
+        """The ids of p and of the pkgs it (transitively) depends on."""
+        seen = set([p])
+        stack = [p]
+        while stack:
+            p = stack.pop()
+            # the edges of all the versions of a pkg are contiguous
+            start = self.depOffsets[self.versionOffsets[p]]
+            end = self.depOffsets[self.versionOffsets[p + 1]]
+            for dep in self.depPkgs[start:end]:
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def solve(self, root, pkgsLockedHint=None):
+        """Same as `edge.solve`, returning names and versions.
+
+        Only the pkgs reachable from root are looked at (and returned), so
+        that solving from a graph of a whole registry stays cheap.
+        """
+        if pkgsLockedHint is not None:
+            pkgsLockedHint = self.from_locked(pkgsLockedHint)
+        rootId = self.pkg_id(root)
+        if rootId is None:
+            raise KeyError(root)
+        subgraph = CompactSubgraph(self, self.reachable(rootId))
+        state = edge.BitsState(subgraph, rootId, pkgsLockedHint)
+        state.attempt_pkg_traversal(rootId)
+        return self.to_locked(state.pkgsLocked)
+
+    # Mapping of pkg id -> `CompactVersions`, for the known pkgs.
+
+    def __getitem__(self, p):
+        if not 0 <= p < len(self.pkgs):
+            raise KeyError(p)
+        return CompactVersions(self, p)
+
+    def __iter__(self):
+        known = self.known
+        for p in range(len(known)):
+            if known[p]:
+                yield p
+
+    def __len__(self):
+        return self.knownCount
+
+    def __setattr__(self, name, value):
+        if hasattr(self, 'depBits'):
+            raise AttributeError("CompactGraph is frozen")
+        super(CompactGraph, self).__setattr__(name, value)
+
+
+class SnapshotGraph(CompactGraph):
+    """A `CompactGraph` read from a snapshot in a buffer (i.e. an mmap).
+
+    The arrays are memoryviews of the buffer; the pkg names, versions and
+    accepted versions are decoded from it when they are accessed. `close`
+    releases the views, after which the graph can't be used.
+    """
+    __slots__ = ('buffer', 'views')
+
+    def __init__(self, buffer):
+        buffer = memoryview(buffer).cast('B')
+        if sys.byteorder != 'little':
+            raise ValueError("Snapshots are only supported on little-endian platforms")
+        if bytes(buffer[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError("Not a graph snapshot")
+        header = SNAPSHOT_HEADER.unpack_from(buffer, len(SNAPSHOT_MAGIC))
+        (pkgCount, versionCount, edgeCount, knownCount) = header[:4]
+
+        views = []
+
+        def section(i, fmt='B'):
+            offset = header[4 + 2 * i]
+            view = buffer[offset:offset + header[5 + 2 * i]].cast(fmt)
+            views.append(view)
+            return view
+
+        self.buffer = buffer
+        self.views = views
+        self._init(
+            _PackedStrings(section(1, 'q'), section(2)),
+            section(0),
+            knownCount,
+            section(3, 'i'),
+            _PackedVersions(_PackedStrings(section(4, 'q'), section(5))),
+            section(6, 'i'),
+            section(7, 'i'),
+            _PackedBits(section(8, 'q'), section(9)),
+        )
+        if (len(self.pkgs), len(self.versions), len(self.depPkgs)) != (pkgCount, versionCount, edgeCount):
+            raise ValueError("Truncated graph snapshot")
+
+    def close(self):
+        """Release the views of the buffer.
+
+        Raises `BufferError` if views taken from the graph are still used.
+        """
+        for view in self.views:
+            view.release()
+        self.buffer.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SharedGraph(SnapshotGraph):
+    """A `SnapshotGraph` read from shared memory, see `attach`."""
+    __slots__ = ('sharedMemory',)
+
+    def __init__(self, sharedMemory):
+        self.sharedMemory = sharedMemory
+        super(SharedGraph, self).__init__(sharedMemory.buf.toreadonly())
+
+    def close(self):
+        """Release the views, then close (but don't unlink) the shared memory."""
+        super(SharedGraph, self).close()
+        self.sharedMemory.close()
+
+    def __del__(self):
+        # Before the SharedMemory is collected: it can't close its mapping
+        # while the views use it.
+        if hasattr(self, 'views'):
+            self.close()
+
+
+def publish(graph, name=None):
+    """Copy graph (as a snapshot) to a new block of shared memory.
+
+    Return the `multiprocessing.shared_memory.SharedMemory`, whose name the
+    worker processes `attach` to. The caller closes and unlinks it once the
+    workers are done.
+    """
+    data = io.BytesIO()
+    graph.dump(data)
+    data = data.getbuffer()
+    sharedMemory = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    sharedMemory.buf[:len(data)] = data
+    _published.add(sharedMemory.name)
+    return sharedMemory
+
+
+# The names of the blocks published by this process (or its parent, when
+# forked).
+_published = set()
+
+
+def attach(name):
+    """Return a read-only `SharedGraph` of the graph published as name.
+
+    Nothing is copied: the memory used by a worker does not grow with the
+    size of the graph, only with what its solves look at. Close the graph
+    once done (it is a context manager).
+    """
+    if sys.version_info >= (3, 13):
+        sharedMemory = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        sharedMemory = shared_memory.SharedMemory(name=name)
+        # This registered the block with the resource tracker, which unlinks
+        # it when the tracker stops: opt out, unless the block is registered
+        # there by the publisher already, i.e. in the publisher itself or in
+        # a multiprocessing worker, which shares the tracker of the process
+        # that started it. The tracker keeps a single entry for both.
+        if (os.name == 'posix' and name not in _published
+                and multiprocessing.parent_process() is None):
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(sharedMemory._name, 'shared_memory')
+    return SharedGraph(sharedMemory)
+
+
+def load(path):
+    """Map the snapshot at path (see `CompactGraph.dump`) in memory.
+
+    The pages of the file are shared by every process that loads it.
+    """
+    with open(path, 'rb') as fileobj:
+        buffer = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+    return SnapshotGraph(buffer)
+
+
+SNAPSHOT_MAGIC = b'SVGRAPH1'
+# pkgs, versions, edges and known pkgs count, then (offset, length) of each
+# section
+SNAPSHOT_HEADER = struct.Struct('<4Q20Q')
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _blob_offsets(items):
+    offsets = array.array('q', [0])
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    return offsets
+
+
+class _Packed(object):
+    """A read-only sequence of items packed in a blob, at offsets."""
+    __slots__ = ('offsets', 'blob')
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(len(self))))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._decode(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _PackedStrings(_Packed):
+    __slots__ = ()
+
+    @staticmethod
+    def _decode(data):
+        return bytes(data).decode('utf-8')
+
+
+class _PackedBits(_Packed):
+    __slots__ = ()
+
+    @staticmethod
+    def _decode(data):
+        return int.from_bytes(data, 'little')
+
+
+class _PackedVersions(object):
+    """The versions of a snapshot, parsed when accessed."""
+    __slots__ = ('strings',)
+
+    def __init__(self, strings):
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(len(self))))
+        return base.Version.parse(self.strings[i])
+
+
+class CompactSubgraph(Mapping):
+    """The pkgs of a `CompactGraph` restricted to some pkg ids."""
+    __slots__ = ('graph', 'pkgIds')
+
+    def __init__(self, graph, pkgIds):
+        self.graph = graph
+        self.pkgIds = pkgIds
+
+    def __getitem__(self, p):
+        return self.graph[p]
+
+    def __iter__(self):
+        known = self.graph.known
+        return (p for p in self.pkgIds if known[p])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class CompactVersions(Mapping):
+    """The versions of a pkg in a `CompactGraph`: `index -> CompactDeps`."""
+    __slots__ = ('graph', 'offset', 'count')
+
+    def __init__(self, graph, p):
+        self.graph = graph
+        self.offset = graph.versionOffsets[p]
+        self.count = graph.versionOffsets[p + 1] - self.offset
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise KeyError(index)
+        return CompactDeps(self.graph, self.offset + index)
+
+    def __iter__(self):
+        return iter(range(self.count))
+
+    def __len__(self):
+        return self.count
+
+
+class CompactDeps(Mapping):
+    """The deps of a node in a `CompactGraph`: `dep id -> bits`."""
+    __slots__ = ('graph', 'start', 'end')
+
+    def __init__(self, graph, node):
+        self.graph = graph
+        self.start = graph.depOffsets[node]
+        self.end = graph.depOffsets[node + 1]
+
+    def __getitem__(self, dep):
+        depPkgs = self.graph.depPkgs
+        # deps are sorted by id
+        e = bisect.bisect_left(depPkgs, dep, self.start, self.end)
+        if e < self.end and depPkgs[e] == dep:
+            return self.graph.depBits[e]
+        raise KeyError(dep)
+
+    def __iter__(self):
+        return iter(self.graph.depPkgs[self.start:self.end])
+
+    def __len__(self):
+        return self.end - self.start
+
+    def items(self):
+        return zip(
+            self.graph.depPkgs[self.start:self.end],
+            self.graph.depBits[self.start:self.end],
+        )
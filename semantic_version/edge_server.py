@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""A reference, in-process implementation of the edge server.
+
+It answers edge requests (see ARCH_EDGES.md) from a sorted index of the
+versions of each pkg, and can be used in place of a real server in tests
+and benchmarks.
+"""
+
+import bisect
+
+from . import edge
+
+
+class VersionIndex(object):
+    """The sorted versions of a pkg, and which of them are yanked.
+
+    The nearest non-yanked version at or above (and at or below) each
+    version is precomputed, so that every edge is answered with one bisection.
+    """
+
+    def __init__(self, versions, yanked=()):
+        self.versions = sorted(versions)
+        yanked = set(yanked)
+        self.yanked = [version in yanked for version in self.versions]
+
+        count = len(self.versions)
+        # index of the nearest non-yanked version, or -1 / count if none
+        self.availableBelow = [-1] * count
+        self.availableAbove = [count] * count
+        below = -1
+        for i in range(count):
+            if not self.yanked[i]:
+                below = i
+            self.availableBelow[i] = below
+        above = count
+        for i in reversed(range(count)):
+            if not self.yanked[i]:
+                above = i
+            self.availableAbove[i] = above
+
+    def query(self, edges):
+        """Return the (sorted) indexes of the versions answering edges.
+
+        - EdgeGte: the lowest version at or above the edge and, if it is
+          yanked, the next non-yanked version. Also the highest non-yanked
+          version.
+        - EdgeLt: the version directly below the edge and, if it is yanked,
+          the next non-yanked version below it.
+        """
+        versions = self.versions
+        count = len(versions)
+        found = set()
+        if not count:
+            return []
+
+        highest = self.availableBelow[count - 1]
+        for req in edges:
+            i = bisect.bisect_left(versions, req.version)
+            if req.kind == req.KIND_GTE:
+                if i < count:
+                    found.add(i)
+                    if self.yanked[i] and self.availableAbove[i] < count:
+                        found.add(self.availableAbove[i])
+                if highest >= 0:
+                    found.add(highest)
+            elif req.kind == req.KIND_LT:
+                i -= 1
+                if i >= 0:
+                    found.add(i)
+                    if self.yanked[i] and self.availableBelow[i] >= 0:
+                        found.add(self.availableBelow[i])
+            else:  # pragma: no cover
+                raise ValueError('Unexpected edge kind: %r' % req.kind)
+        return sorted(found)
+
+    def is_yanked(self, version):
+        i = bisect.bisect_left(self.versions, version)
+        return i < len(self.versions) and self.versions[i] == version and self.yanked[i]
+
+
+class EdgeServer(object):
+    """Answer edge requests for the pkgs of a registry.
+
+    pkgsVersionsSpecs is the registry: ``pkg -> {version: {dep: specs}}``.
+    pkgsYanked optionally lists the yanked versions: ``pkg -> versions``.
+    """
+
+    def __init__(self, pkgsVersionsSpecs, pkgsYanked=None):
+        pkgsYanked = pkgsYanked or {}
+        self.pkgsVersionsSpecs = pkgsVersionsSpecs
+        self.indexes = {
+            pkg: VersionIndex(pkgVersionsSpecs.keys(), pkgsYanked.get(pkg, ()))
+            for (pkg, pkgVersionsSpecs) in pkgsVersionsSpecs.items()
+        }
+
+    def versions(self, pkg, edges):
+        """The versions answering edges; a ``retrieve_fn`` for
+        `edge.retrieve_edge_versions`.
+        """
+        index = self.indexes.get(pkg)
+        if index is None:
+            return []
+        return [index.versions[i] for i in index.query(edges)]
+
+    def retrieve(self, pkg, edges):
+        """The versions answering edges with their dependencies; a
+        ``retrieve_fn`` for `edge.EdgeDiscovery`.
+        """
+        pkgVersionsSpecs = self.pkgsVersionsSpecs.get(pkg, {})
+        return {
+            version: pkgVersionsSpecs[version]
+            for version in self.versions(pkg, edges)
+        }
+
+    def is_yanked(self, pkg, version):
+        index = self.indexes.get(pkg)
+        return index is not None and index.is_yanked(version)
+
+    def retrieve_edge_versions(self, pkgEdges):
+        return edge.retrieve_edge_versions(self.versions, pkgEdges)
+
+    def serve_lines(self, requestLines):
+        """Answer a batched request in the `edge.WireEncoder` format,
+        yielding the lines of the response.
+        """
+        requests = edge.decode_request(requestLines)
+        return edge.encode_response(
+            (pkg, self.retrieve(pkg, edges)) for (pkg, edges) in requests
+        )
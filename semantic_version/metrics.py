@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Opt-in counters of the work done on the hot paths.
+
+`enable` replaces a few methods of `base` with counting wrappers, and
+`disable` puts the originals back: while disabled, nothing is added to the
+hot paths. The counters are process wide::
+
+    from semantic_version import metrics
+
+    metrics.enable()
+    ...
+    export(metrics.snapshot())
+    metrics.reset()
+
+They count:
+
+- ``parse``: calls to `Version.parse`, including the ones made by
+  `Version.coerce` (so misses only, with `base.parse_memoized`);
+- ``coerce``: calls to `Version.coerce`;
+- ``compare``: comparisons of two Versions (``<``, ``==``, ``sorted()``...);
+- ``match``: calls to `VersionReq.match`, by kind;
+- ``filter_scanned`` and ``filter_yielded``: the versions read and returned
+  by `Spec.filter` (and so `Spec.select`).
+
+Methods are replaced on their classes: references taken before `enable`
+(``parse = Version.parse``) aren't counted. Counting isn't locked: with
+threads, the counts are approximate.
+"""
+
+import collections
+import functools
+
+from . import base
+
+
+counts = collections.Counter()
+match_counts = collections.Counter()
+
+# (cls, name) -> the original attribute, while enabled.
+_originals = {}
+
+
+def enable():
+    """Start counting."""
+    if _originals:
+        return
+    _patch(base.Version, 'parse', _counting_classmethod)
+    _patch(base.Version, 'coerce', _counting_classmethod)
+    _patch(base.Version, '__cmp__', _counting_cmp)
+    _patch(base.VersionReq, 'match', _counting_match)
+    _patch(base.Spec, 'filter', _counting_filter)
+
+
+def disable():
+    """Stop counting; the counts are kept until `reset`."""
+    while _originals:
+        ((cls, name), original) = _originals.popitem()
+        setattr(cls, name, original)
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def snapshot():
+    """A copy of the counts, as a dict of ints (``match`` is ``kind -> int``)."""
+    result = dict((key, counts[key]) for key in (
+        'parse', 'coerce', 'compare', 'filter_scanned', 'filter_yielded'))
+    result['match'] = dict(match_counts)
+    return result
+
+
+def reset():
+    counts.clear()
+    match_counts.clear()
+
+
+def _patch(cls, name, wrap):
+    original = cls.__dict__[name]
+    _originals[(cls, name)] = original
+    setattr(cls, name, wrap(name, original))
+
+
+def _counting_classmethod(name, original):
+    func = original.__func__
+
+    @functools.wraps(func)
+    def counted(cls, *args, **kwargs):
+        counts[name] += 1
+        return func(cls, *args, **kwargs)
+
+    return classmethod(counted)
+
+
+def _counting_cmp(name, original):
+    @functools.wraps(original)
+    def __cmp__(self, other):
+        counts['compare'] += 1
+        return original(self, other)
+
+    return __cmp__
+
+
+def _counting_match(name, original):
+    @functools.wraps(original)
+    def match(self, version):
+        match_counts[self.kind] += 1
+        return original(self, version)
+
+    return match
+
+
+def _counting_filter(name, original):
+    def scanned(versions):
+        for version in versions:
+            counts['filter_scanned'] += 1
+            yield version
+
+    @functools.wraps(original)
+    def filter(self, versions):
+        for version in original(self, scanned(versions)):
+            counts['filter_yielded'] += 1
+            yield version
+
+    return filter
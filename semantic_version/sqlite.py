@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Semantic versions in plain `sqlite3` databases.
+
+After `register`, versions can be sorted and matched by the database::
+
+    connection = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    semantic_version.sqlite.register(connection)
+    connection.execute("CREATE TABLE releases (name TEXT, version SEMVER)")
+    connection.execute(
+        "SELECT version FROM releases WHERE semver_match(?, version)"
+        " ORDER BY version COLLATE SEMVER DESC",
+        (Spec('>=1.0.0'),),
+    )
+
+Strings are parsed once, through `base.parse_memoized`.
+"""
+
+import sqlite3
+
+from . import base
+from .compat import base_cmp
+
+
+COLLATION = 'SEMVER'
+VERSION_TYPE = 'SEMVER'
+SPEC_TYPE = 'SEMVER_SPEC'
+
+
+def register(connection):
+    """Register the SEMVER collation and the semver_* functions on connection.
+
+    This also registers the (process wide) adapters storing Version and Spec
+    as text, and the converters reading back columns declared as SEMVER or
+    SEMVER_SPEC when connections use ``detect_types=PARSE_DECLTYPES``.
+    """
+    connection.create_collation(COLLATION, collate)
+    _create_function(connection, 'semver_match', 2, semver_match)
+    _create_function(connection, 'semver_key', 1, semver_key)
+    _create_function(connection, 'semver_compare', 2, semver_compare)
+    register_adapters()
+
+
+def register_adapters():
+    """Register the adapters and converters for Version and Spec."""
+    for version_class in (base.Version, base.LazyVersion):
+        sqlite3.register_adapter(version_class, str)
+    sqlite3.register_adapter(base.Spec, str)
+    sqlite3.register_converter(VERSION_TYPE, convert_version)
+    sqlite3.register_converter(SPEC_TYPE, convert_spec)
+
+
+def collate(a, b):
+    """The SEMVER collation: by version precedence.
+
+    Versions with the same precedence (differing by build metadata) sort as
+    text, so that only identical strings collate equal. Text which isn't a
+    valid version sorts after all versions, as text.
+    """
+    va = _parse(a)
+    vb = _parse(b)
+    if va is not None and vb is not None:
+        return _precedence(va, vb) or base_cmp(a, b)
+    elif va is not None:
+        return -1
+    elif vb is not None:
+        return 1
+    return base_cmp(a, b)
+
+
+def semver_match(spec, version):
+    """SQL function: whether version matches spec, NULL if either is."""
+    if spec is None or version is None:
+        return None
+    return int(base.spec_memoized(spec).match(base.parse_memoized(version)))
+
+
+def semver_key(version):
+    """SQL function: the `base.version_key` of version, NULL if it is."""
+    if version is None:
+        return None
+    return base.version_key(base.parse_memoized(version))
+
+
+def semver_compare(a, b):
+    """SQL function: -1, 0 or 1 as a has a lower, the same or a higher
+    precedence than b (0 when they only differ by build metadata).
+    """
+    if a is None or b is None:
+        return None
+    return _precedence(base.parse_memoized(a), base.parse_memoized(b))
+
+
+def convert_version(value):
+    return base.Version.parse(value.decode('utf-8'))
+
+
+def convert_spec(value):
+    return base.Spec.from_str(value.decode('utf-8'))
+
+
+def _precedence(va, vb):
+    result = base_cmp(va, vb)
+    # Build metadata has no ordering: base_cmp doesn't decide.
+    return 0 if result is NotImplemented else result
+
+
+def _parse(text):
+    try:
+        return base.parse_memoized(text)
+    except ValueError:
+        return None
+
+
+def _create_function(connection, name, narg, func):
+    try:
+        # Allows using them in indexes (Python 3.8+, SQLite 3.8.3+).
+        connection.create_function(name, narg, func, deterministic=True)
+    except (TypeError, sqlite3.NotSupportedError):
+        connection.create_function(name, narg, func)
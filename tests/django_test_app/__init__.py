@@ -27,4 +27,6 @@ if django_loaded:  # pragma: no cover
     # https://docs.djangoproject.com/en/dev/releases/1.7/#app-loading-changes
     if django.VERSION >= (1, 7):
         from django.apps import apps
-        apps.populate(settings.INSTALLED_APPS)
+        # Unless imported by django.setup(), which is populating already.
+        if not apps.loading:
+            apps.populate(settings.INSTALLED_APPS)
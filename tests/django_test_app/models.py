@@ -26,3 +26,16 @@ if django_loaded:
     class CoerceVersionModel(models.Model):
         version = semver_fields.VersionField(verbose_name='my version', coerce=True)
         partial = semver_fields.VersionField(verbose_name='partial version', coerce=True, partial=True)
+
+
+    class Release(models.Model):
+        package = models.CharField(max_length=50)
+        version = semver_fields.VersionField(sortable=True)
+
+
+    class LazyVersionModel(models.Model):
+        version = semver_fields.VersionField(lazy=True, blank=True, null=True)
+
+
+    class Advisory(models.Model):
+        affected = semver_fields.SpecField(bounds=True, blank=True, null=True)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+"""Tests of edge_async, imported by test_edge_async on Python 3.5+."""
+
+import asyncio
+import threading
+
+from .compat import unittest
+
+from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_async
+from semantic_version import edge_cache
+
+from .test_edge import get_pkg_edge_versions, pkgsVersionsSpecsSimple
+
+V = base.Version
+S = base.Spec.from_str
+
+
+class FakeRegistry(object):
+    """An in-process registry which answers after some latency."""
+
+    def __init__(self, db, latency=0.01):
+        self.db = db
+        self.latency = latency
+        self.requests = []
+        self.active = 0
+        self.maxActive = 0
+
+    async def retrieve(self, pkg, edges):
+        self.requests.append(pkg)
+        self.active += 1
+        self.maxActive = max(self.maxActive, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            return get_pkg_edge_versions(self.db, pkg, edges)
+        finally:
+            self.active -= 1
+
+
+def run(coroutine):
+    """asyncio.run, which needs Python 3.7."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def many_pkgs_edges(count):
+    pkgEdges = edge.PkgsEdges()
+    pkgEdges.update({
+        'root': {
+            V(1, 0, 0): {
+                'pkg%d' % i: [S('^1.0.0')] for i in range(count)
+            },
+        },
+    })
+    return pkgEdges
+
+
+class AsyncRetrieveTestCase(unittest.TestCase):
+    def test_retrieve_simple(self):
+        registry = FakeRegistry(pkgsVersionsSpecsSimple)
+        pkgEdges = edge.PkgsEdges()
+        pkgEdges.update({'pkgA': pkgsVersionsSpecsSimple['pkgA']})
+
+        pkgVersions = run(
+            edge_async.retrieve_edge_versions(registry.retrieve, pkgEdges)
+        )
+        assert pkgVersions == {
+            'pkgB': {V(1, 0, 0), V(1, 2, 0)},
+            'pkgE': {V(1, 0, 0), V(2, 9, 0)},
+        }
+
+    def test_concurrency_limit(self):
+        db = {
+            'pkg%d' % i: [V(1, 0, 0), V(1, 5, 0)] for i in range(12)
+        }
+        registry = FakeRegistry(db, latency=0.02)
+        pkgVersions = run(edge_async.retrieve_edge_versions(
+            registry.retrieve, many_pkgs_edges(12), limit=4,
+        ))
+        assert len(pkgVersions) == 12
+        assert pkgVersions['pkg3'] == {V(1, 0, 0), V(1, 5, 0)}
+        assert registry.maxActive == 4
+
+    def test_coalescing(self):
+        db = {
+            'pkg%d' % i: [V(1, 0, 0)] for i in range(5)
+        }
+        registry = FakeRegistry(db)
+        retriever = edge_async.AsyncEdgeRetriever(registry.retrieve)
+
+        async def retrieve_twice():
+            return await asyncio.gather(
+                retriever.retrieve_edge_versions(many_pkgs_edges(5)),
+                retriever.retrieve_edge_versions(many_pkgs_edges(3)),
+            )
+
+        (first, second) = run(retrieve_twice())
+        assert first['pkg1'] == second['pkg1'] == {V(1, 0, 0)}
+        assert sorted(registry.requests) == ['pkg%d' % i for i in range(5)]
+        assert retriever.calls == 5
+        assert retriever.coalesced == 3
+        assert retriever.inflight == {}
+
+
+class AsyncCachedTestCase(unittest.TestCase):
+    def test_cached(self):
+        registry = FakeRegistry({'pkg0': [V(1, 0, 0)], 'pkg1': [V(1, 0, 0)]})
+        cache = edge_cache.RetrievalCache()
+        retrieve = edge_async.cached(cache, registry.retrieve)
+
+        async def retrieve_twice():
+            first = await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+            second = await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+            return first, second
+
+        (first, second) = run(retrieve_twice())
+        assert first == second
+        assert sorted(registry.requests) == ['pkg0', 'pkg1']
+        assert cache.hit_rate() == 0.5
+
+    def test_token_fn_overlap(self):
+        registry = FakeRegistry({'pkg0': [V(1, 0, 0)], 'pkg1': [V(1, 0, 0)]})
+        cache = edge_cache.RetrievalCache()
+        # Only passes once both retrievals call token_fn at the same time.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def token_fn(pkg):
+            barrier.wait()
+            return 'etag-' + pkg
+
+        retrieve = edge_async.cached(cache, registry.retrieve, token_fn)
+        pkgVersions = run(edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2)))
+        assert pkgVersions['pkg1'] == {V(1, 0, 0)}
+        assert sorted(entry[1] for entry in cache.entries.values()) == ['etag-pkg0', 'etag-pkg1']
+
+    def test_revalidate_overlap(self):
+        registry = FakeRegistry({'pkg0': [V(1, 0, 0)], 'pkg1': [V(1, 0, 0)]})
+        now = [0]
+        revalidating = []
+
+        async def revalidate(pkg, token):
+            revalidating.append(pkg)
+            await asyncio.sleep(0.01)
+            # Both started before either one is done.
+            return len(revalidating) == 2
+
+        cache = edge_cache.RetrievalCache(ttl=10, revalidate=revalidate, clock=lambda: now[0])
+        retrieve = edge_async.cached(cache, registry.retrieve, lambda pkg: 'etag')
+
+        async def retrieve_expired():
+            await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+            now[0] = 20
+            return await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+
+        pkgVersions = run(retrieve_expired())
+        assert pkgVersions['pkg0'] == {V(1, 0, 0)}
+        assert sorted(revalidating) == ['pkg0', 'pkg1']
+        assert cache.revalidated == 2
+        assert sorted(registry.requests) == ['pkg0', 'pkg1']
+
+    def test_revalidate_in_executor(self):
+        registry = FakeRegistry({'pkg0': [V(1, 0, 0)], 'pkg1': [V(1, 0, 0)]})
+        now = [0]
+        barrier = threading.Barrier(2, timeout=5)
+
+        def revalidate(pkg, token):
+            barrier.wait()
+            return False
+
+        cache = edge_cache.RetrievalCache(ttl=10, revalidate=revalidate, clock=lambda: now[0])
+        retrieve = edge_async.cached(cache, registry.retrieve, lambda pkg: 'etag')
+
+        async def retrieve_expired():
+            await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+            now[0] = 20
+            return await edge_async.retrieve_edge_versions(retrieve, many_pkgs_edges(2))
+
+        run(retrieve_expired())
+        # Not current anymore: retrieved again.
+        assert sorted(registry.requests) == ['pkg0', 'pkg0', 'pkg1', 'pkg1']
+        assert cache.revalidated == 0
@@ -725,5 +725,176 @@ class SpecTestCase(unittest.TestCase):
             len(set([base.Spec.from_str('>=0.1.1'), base.Spec.from_str('>=0.1.1')])))
 
 
+class VersionKeyTestCase(unittest.TestCase):
+    versions = [
+        '0.1.0',
+        '1.0.0-1',
+        '1.0.0-9',
+        '1.0.0-10',
+        '1.0.0-Alpha',
+        '1.0.0-alph',
+        '1.0.0-alpha',
+        '1.0.0-alpha.1',
+        '1.0.0-alpha.beta',
+        '1.0.0-alpha-1',
+        '1.0.0-beta.2',
+        '1.0.0-beta.11',
+        '1.0.0-rc.1',
+        '1.0.0',
+        '1.9.0',
+        '1.10.0',
+        '2.0.0',
+        '10.0.0',
+    ]
+
+    def test_order(self):
+        versions = [base.Version.parse(text) for text in self.versions]
+        keys = [base.version_key(version) for version in versions]
+        self.assertEqual(sorted(keys), keys)
+        self.assertEqual(len(set(keys)), len(keys))
+        for key in keys:
+            self.assertTrue(set(key) <= set('0123456789abcdef'), key)
+
+    def test_round_trip(self):
+        for text in list(VersionTestCase.versions) + self.versions:
+            version = base.Version.parse(text)
+            key = base.version_key(version)
+            self.assertEqual(text, str(base.version_from_key(key)))
+
+    def test_build(self):
+        a = base.version_key(base.Version.parse('1.0.0+build.1'))
+        b = base.version_key(base.Version.parse('1.0.0+build.2'))
+        self.assertNotEqual(a, b)
+        self.assertTrue(base.version_key(base.Version.parse('1.0.0-rc.1+build')) < a)
+        self.assertTrue(a < base.version_key(base.Version.parse('1.0.1')))
+
+    def test_spec_key_bounds(self):
+        versions = [
+            base.Version.parse(text)
+            for text in list(VersionTestCase.versions) + self.versions
+        ]
+        specs = [
+            '*', '==1.0', '==1.0.0-alpha', '==1.0.0+0.3.7', '!=1.0.0',
+            '<1', '<=1.0.0-alpha', '>1.0', '>=1.0.0,!=1.9',
+            '^1.0.0', '^0.1.0', '~1.0.0', '~=1.0', '~=1.0.0',
+            '>=1.0.0-alpha,<1.10',
+        ]
+        for text in specs:
+            spec = base.Spec.from_str(text)
+            lo, hi, excluded = base.spec_key_bounds(spec)
+            for version in versions:
+                key = base.version_key(version)
+                matched = (
+                    (lo is None or lo <= key)
+                    and (hi is None or key < hi)
+                    and not any(a <= key < b for a, b in excluded)
+                )
+                self.assertEqual(spec.match(version), matched, (text, version))
+
+                containing = base.containing_key_ranges(version)
+                for (a, b) in excluded:
+                    self.assertEqual(a <= key < b, (a, b) in containing, (text, version))
+
+    def test_spec_key_bounds_partial(self):
+        # ~1 has no minor to bump: no upper bound.
+        spec = base.Spec.from_str('~1')
+        lo = base.version_key_range(spec.requirements[0].version)[0]
+        self.assertEqual((lo, None, []), base.spec_key_bounds(spec))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            base.version_key(base.Version.parse('1.0', partial=True))
+        for key in ['', '011', '0110110139', '01101101331', 'zz']:
+            with self.assertRaises(ValueError):
+                base.version_from_key(key)
+
+
+class LazyVersionTestCase(unittest.TestCase):
+    def test_str_does_not_parse(self):
+        version = base.LazyVersion('1.2.0')
+        self.assertEqual('1.2.0', str(version))
+        self.assertEqual(None, version._version)
+
+        version = base.LazyVersion('not a version')
+        self.assertEqual('not a version', str(version))
+        with self.assertRaises(ValueError):
+            version.major
+
+    def test_fields(self):
+        version = base.LazyVersion('1.2.3-rc.1+build')
+        self.assertEqual(
+            (1, 2, 3, ('rc', '1'), ('build',)),
+            tuple(version),
+        )
+        self.assertFalse(version.partial)
+        self.assertTrue(base.LazyVersion('1.2', partial=True).partial)
+        self.assertEqual('0.1.0', str(base.LazyVersion('0.1', coerce=True)))
+
+    def test_compare(self):
+        lazy = base.LazyVersion('1.2.0')
+        version = base.Version.parse('1.2.0')
+        self.assertTrue(lazy == version)
+        self.assertTrue(version == lazy)
+        self.assertFalse(lazy != version)
+        self.assertEqual(hash(version), hash(lazy))
+        self.assertTrue(lazy < base.Version.parse('1.10.0'))
+        self.assertTrue(base.Version.parse('1.10.0') > lazy)
+        self.assertEqual(
+            ['0.9.0', '1.2.0', '1.10.0'],
+            [str(v) for v in sorted([base.Version.parse('1.10.0'), lazy, base.LazyVersion('0.9.0')])],
+        )
+        self.assertTrue(base.Spec.from_str('^1.0.0').match(lazy))
+
+    def test_compare_both_directions(self):
+        lazy = base.LazyVersion('1.2.0')
+        for version, expected in [('1.1.0', 1), ('1.2.0', 0), ('1.10.0', -1)]:
+            version = base.Version.parse(version)
+            self.assertEqual(expected, lazy.__cmp__(version))
+            self.assertEqual(-expected, version.__cmp__(lazy))
+            self.assertEqual(expected < 0, lazy.__lt__(version))
+            self.assertEqual(expected > 0, version.__lt__(lazy))
+            self.assertEqual(expected == 0, lazy.__eq__(version))
+            self.assertEqual(expected == 0, version.__eq__(lazy))
+        self.assertEqual(NotImplemented, lazy.__cmp__('1.2.0'))
+        self.assertFalse(lazy == '1.2.0')
+
+    def test_repr_does_not_parse(self):
+        self.assertEqual("LazyVersion('not a version')", repr(base.LazyVersion('not a version')))
+        self.assertEqual(
+            "LazyVersion('1.2', partial=True)",
+            repr(base.LazyVersion('1.2', partial=True)),
+        )
+
+
+class ParseMemoTestCase(unittest.TestCase):
+    def setUp(self):
+        base._parse_memo.clear()
+        self.addCleanup(base._parse_memo.clear)
+
+    def test_memoized(self):
+        version = base.parse_memoized('1.2.0')
+        self.assertEqual(base.Version.parse('1.2.0'), version)
+        self.assertTrue(base.parse_memoized('1.2.0') is version)
+        self.assertTrue(base.parse_memoized('1.2', partial=True).partial)
+        self.assertEqual('1.2.0', str(base.parse_memoized('1.2', coerce=True)))
+        with self.assertRaises(ValueError):
+            base.parse_memoized('1.2')
+
+    def test_spec(self):
+        spec = base.spec_memoized('>=1.0.0,!=1.2.0')
+        self.assertEqual(base.Spec.from_str('>=1.0.0,!=1.2.0'), spec)
+        self.assertTrue(base.spec_memoized('>=1.0.0,!=1.2.0') is spec)
+
+    def test_bounded(self):
+        size = base.PARSE_MEMO_SIZE
+        base.PARSE_MEMO_SIZE = 2
+        try:
+            for minor in range(5):
+                base.parse_memoized('1.%d.0' % minor)
+                self.assertTrue(len(base._parse_memo) <= 2)
+        finally:
+            base.PARSE_MEMO_SIZE = size
+
+
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
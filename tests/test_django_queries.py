@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+from __future__ import unicode_literals
+
+from .compat import unittest
+
+from semantic_version import base
+
+from .setup_django import django_loaded
+
+
+if django_loaded:  # pragma: no cover
+    from django.core.exceptions import FieldError
+    from django.db import connection
+    from django.test import TestCase as DjangoTestCase
+    from django.test import runner as django_test_runner
+    from django.test import utils as django_test_utils
+
+    from semantic_version import django_fields
+    from .django_test_app import models
+
+else:
+    DjangoTestCase = unittest.TestCase
+
+
+V = base.Version.parse
+S = base.Spec.from_str
+
+VERSIONS = [
+    '0.1.0', '1.0.0-alpha', '1.0.0-rc.1', '1.0.0', '1.0.1', '1.2.0-rc.1', '1.2.0',
+    '1.4.1', '1.4.2', '1.10.0', '2.0.0-alpha', '2.0.0',
+]
+
+test_state = {}
+
+
+def setUpModule():
+    if not django_loaded:  # pragma: no cover
+        raise unittest.SkipTest("Django not installed")
+    django_test_utils.setup_test_environment()
+    runner = django_test_runner.DiscoverRunner(verbosity=0)
+    test_state.update({
+        'runner': runner,
+        'runner_state': runner.setup_databases(),
+    })
+
+
+def tearDownModule():
+    if not django_loaded:  # pragma: no cover
+        return
+    test_state['runner'].teardown_databases(test_state['runner_state'])
+    django_test_utils.teardown_test_environment()
+
+
+@unittest.skipIf(not django_loaded, "Django not installed")
+class SortableVersionTestCase(DjangoTestCase):
+    def setUp(self):
+        # Not in order.
+        for version in reversed(VERSIONS):
+            models.Release.objects.create(package='a', version=version)
+        models.Release.objects.create(package='b', version='0.2.0+build.1')
+
+    def versions(self, queryset):
+        return [str(v) for v in queryset.values_list('version', flat=True)]
+
+    def test_key_on_save(self):
+        release = models.Release.objects.get(package='b')
+        self.assertEqual(base.version_key(V('0.2.0+build.1')), release.version_key)
+
+        release.version = V('3.0.0-beta')
+        release.save()
+        release = models.Release.objects.get(pk=release.pk)
+        self.assertEqual(base.version_key(V('3.0.0-beta')), release.version_key)
+        self.assertEqual(
+            [release.pk],
+            list(models.Release.objects.filter(version_key__gt=base.version_key(V('2.0.0')))
+                 .values_list('pk', flat=True)),
+        )
+
+    def test_order_by(self):
+        releases = models.Release.objects.filter(package='a')
+        self.assertEqual(VERSIONS, self.versions(releases.order_by('version_key')))
+        self.assertEqual(VERSIONS[::-1], self.versions(releases.order_by('-version_key')))
+
+    def test_satisfies(self):
+        releases = models.Release.objects.filter(package='a')
+        for spec in [
+                '>=1.0.0', '<1.0.0', '>=1.0.0-alpha,<1.2.0', '^1.0.0', '~1.2.0', '==1.2.0',
+                '!=1.2.0', '>=1.0.0,!=1.4.1', '>=1.0.0-rc.1,!=1.0.0-rc.1', '!=1.4', '*']:
+            self.assertEqual(
+                [str(v) for v in S(spec).filter(V(v) for v in VERSIONS)],
+                self.versions(releases.filter(version__satisfies=spec).order_by('version_key')),
+                spec,
+            )
+
+        # Spec objects too.
+        self.assertEqual(
+            ['0.1.0', '0.2.0+build.1'],
+            self.versions(models.Release.objects.filter(version__satisfies=S('<0.3.0')).order_by('version_key')),
+        )
+
+    def test_satisfies_not_sortable(self):
+        with self.assertRaises(FieldError):
+            list(models.VersionModel.objects.filter(version__satisfies='>=1.0.0'))
+
+    def test_aggregates(self):
+        self.assertEqual(
+            {'version__maxversion': V('2.0.0'), 'version__minversion': V('0.1.0')},
+            models.Release.objects.aggregate(
+                django_fields.MaxVersion('version'), django_fields.MinVersion('version')),
+        )
+        # Not 1.4.2 and 1.10.0-rc.1 as text would.
+        self.assertEqual(
+            {'version__maxversion': V('1.10.0'), 'version__minversion': V('1.0.0-alpha')},
+            models.Release.objects.filter(version__satisfies='>=1.0.0-alpha,<2.0.0-alpha').aggregate(
+                django_fields.MaxVersion('version'), django_fields.MinVersion('version')),
+        )
+        self.assertEqual(
+            [('a', V('2.0.0')), ('b', V('0.2.0+build.1'))],
+            list(models.Release.objects.values('package')
+                 .annotate(latest=django_fields.MaxVersion('version'))
+                 .order_by('package').values_list('package', 'latest')),
+        )
+        self.assertEqual(
+            {'version__maxversion': None},
+            models.Release.objects.filter(package='c').aggregate(django_fields.MaxVersion('version')),
+        )
+
+    def test_version_key_window(self):
+        if not getattr(connection.features, 'supports_over_clause', False):
+            raise unittest.SkipTest("Window functions not supported")
+        from django.db.models import F, Window
+        from django.db.models.functions import FirstValue
+
+        latest = models.Release.objects.annotate(latest=Window(
+            FirstValue('version'),
+            partition_by=F('package'),
+            order_by=django_fields.VersionKey('version').desc(),
+        )).values_list('package', 'latest').distinct().order_by('package')
+        self.assertEqual([('a', '2.0.0'), ('b', '0.2.0+build.1')], [(p, str(v)) for (p, v) in latest])
+
+
+@unittest.skipIf(not django_loaded, "Django not installed")
+class LazyVersionTestCase(DjangoTestCase):
+    def test_lazy(self):
+        models.LazyVersionModel.objects.create(version='1.2.0-rc.1')
+        models.LazyVersionModel.objects.create(version='1.10.0')
+        models.LazyVersionModel.objects.create(version=None)
+
+        versions = list(models.LazyVersionModel.objects.order_by('pk').values_list('version', flat=True))
+        self.assertIsNone(versions[2])
+        for version in versions[:2]:
+            self.assertIsInstance(version, base.LazyVersion)
+            self.assertIsNone(version._version)
+
+        # Rendered without parsing.
+        self.assertEqual(['1.2.0-rc.1', '1.10.0'], [str(v) for v in versions[:2]])
+        self.assertIsNone(versions[0]._version)
+
+        self.assertEqual([V('1.2.0-rc.1'), V('1.10.0')], sorted(versions[:2]))
+        self.assertEqual(10, versions[1].minor)
+
+
+@unittest.skipIf(not django_loaded, "Django not installed")
+class SpecBoundsTestCase(DjangoTestCase):
+    specs = [
+        '*', '==1.0', '==1.0.0-alpha', '!=1.0.0', '<1.0.0', '<=1.0.0-alpha', '>1.0', '>=1.0.0,!=1.4.1',
+        '^1.0.0', '~1.2.0', '>=1.0.0-alpha,<1.10.0', '!=1,!=2.0', '!=1.0.0-rc.1,>=1.0.0-alpha',
+    ]
+
+    def setUp(self):
+        for spec in self.specs:
+            models.Advisory.objects.create(affected=spec)
+        models.Advisory.objects.create(affected=None)
+
+    def test_admits(self):
+        for version in VERSIONS + ['1.4.1+build.2']:
+            self.assertEqual(
+                sorted(str(S(spec)) for spec in self.specs if S(spec).match(V(version))),
+                sorted(str(advisory.affected) for advisory in models.Advisory.objects.filter(
+                    affected__admits=version)),
+                version,
+            )
+        self.assertEqual(
+            models.Advisory.objects.filter(affected__admits='1.2.0').count(),
+            models.Advisory.objects.filter(affected__admits=V('1.2.0')).count(),
+        )
+
+    def test_bounds_on_save(self):
+        advisory = models.Advisory.objects.get(affected='>=1.0.0,!=1.4.1')
+        (lo, hi, excluded) = base.spec_key_bounds(S('>=1.0.0,!=1.4.1'))
+        self.assertEqual(
+            (lo, None, ',%s,' % excluded[0][1]),
+            (advisory.affected_lo, advisory.affected_hi, advisory.affected_excluded),
+        )
+
+        advisory.affected = S('>=2.0.0,!=2.1.0')
+        advisory.save()
+        admitting = models.Advisory.objects.filter(pk=advisory.pk)
+        self.assertTrue(admitting.filter(affected__admits='2.2.0').exists())
+        self.assertFalse(admitting.filter(affected__admits='2.1.0').exists())
+        self.assertFalse(admitting.filter(affected__admits='1.4.2').exists())
+
+        advisory.affected = None
+        advisory.save()
+        advisory = models.Advisory.objects.get(pk=advisory.pk)
+        self.assertEqual((None, None, None), (
+            advisory.affected_lo, advisory.affected_hi, advisory.affected_excluded))
+
+    def test_admits_without_bounds(self):
+        with self.assertRaises(FieldError):
+            list(models.VersionModel.objects.filter(spec__admits='1.0.0'))
@@ -1,4 +1,6 @@
 # Tests for solving edges
+import sys
+
 from .compat import unittest
 from pprint import pprint as pp
 
@@ -189,6 +191,37 @@ class EdgesTestCase(unittest.TestCase):
             pE: {V(1, 0, 0), V(2, 9, 0)},
         }
 
+    def test_filter_sorted_by_specs(self):
+        versions = SortedSet(
+            V(mj, mn, p)
+            for mj in range(0, 3)
+            for mn in range(0, 4)
+            for p in range(0, 3)
+        )
+        for specs in [
+                [S("^1.0.0")],
+                [S("^0.2.1")],
+                [S(">=1.2.0, <2.0.0")],
+                [S(">1.2.0"), S("<=2.1")],
+                [S("~1.1.1,!=1.1.2")],
+                [S("==1.3")],
+                [S("*")],
+                [S(">=3.0.0")],
+                [R("<1.0.0"), R(">=0.3.1")],
+        ]:
+            assert (
+                list(edge.filter_sorted_by_specs(specs, versions))
+                == list(edge.filter_by_specs(specs, versions))
+            ), specs
+
+    def test_filter_sorted_by_specs_unbounded(self):
+        # ~1 has no minor to bump, so no upper bound; matching these versions
+        # never needs one either.
+        versions = SortedSet([V(0, 1, 0), V(0, 9, 0)])
+        for specs in [[S("~1")], [S(">=0.5.0"), S("~1")]]:
+            assert list(edge.filter_by_specs(specs, versions)) == []
+            assert list(edge.filter_sorted_by_specs(specs, versions)) == []
+
     def test_complete(self):
         edges = edge.PkgsEdges()
         edges.update(pkgsVersionsSpecsSimple)
@@ -205,5 +238,342 @@ class EdgesTestCase(unittest.TestCase):
         )
 
         solved = edge.solve(pkgsVersionsDeps, pA)
-        import pdb; pdb.set_trace()
-        assert not solved
+        assert solved == {
+            pA: V(2, 3, 0),
+            pB: V(1, 2, 0),
+            pE: V(2, 3, 0),
+        }
+
+
+class PropagationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pkgsVersionsDeps = {
+            pA: {
+                V(1, 0, 0): {
+                    pB: SortedSet([V(1, 0, 0), V(2, 0, 0)]),
+                },
+            },
+            pB: {
+                V(1, 0, 0): {
+                    pC: SortedSet([V(1, 0, 0)]),
+                },
+                V(2, 0, 0): {
+                    # pkgC 2.0.0 does not exist.
+                    pC: SortedSet([V(2, 0, 0)]),
+                },
+            },
+            pC: {
+                V(1, 0, 0): {},
+                V(1, 5, 0): {},
+            },
+        }
+
+    def test_unsupported_versions_are_removed(self):
+        domains = edge.PkgsDomains(self.pkgsVersionsDeps, pA)
+        assert list(domains[pA]) == [V(1, 0, 0)]
+        assert list(domains[pB]) == [V(1, 0, 0)]
+        # Unused versions are not removed, there is nothing that rules them out.
+        assert list(domains[pC]) == [V(1, 0, 0), V(1, 5, 0)]
+
+    def test_lock_narrows_dependencies(self):
+        domains = edge.PkgsDomains(self.pkgsVersionsDeps, pA)
+        mark = domains.mark()
+        domains.lock(pB, V(1, 0, 0))
+        assert list(domains[pC]) == [V(1, 0, 0)]
+
+        domains.undo(mark)
+        assert list(domains[pC]) == [V(1, 0, 0), V(1, 5, 0)]
+        assert pB not in domains.required
+
+    def test_lock_conflict(self):
+        domains = edge.PkgsDomains(self.pkgsVersionsDeps, pA)
+        # No version of pkgB accepts pkgC 1.5.0, so pkgA has no candidates left.
+        with self.assertRaises(edge.NotSolved):
+            domains.lock(pC, V(1, 5, 0))
+
+    def test_unsatisfiable_without_search(self):
+        del self.pkgsVersionsDeps[pB][V(1, 0, 0)]
+        with self.assertRaises(edge.NotSolved):
+            edge.PkgsDomains(self.pkgsVersionsDeps, pA)
+
+        with self.assertRaises(edge.NotSolved):
+            edge.solve(self.pkgsVersionsDeps, pA)
+
+    def test_solve(self):
+        solved = edge.solve(self.pkgsVersionsDeps, pA)
+        assert solved == {
+            pA: V(1, 0, 0),
+            pB: V(1, 0, 0),
+            pC: V(1, 0, 0),
+        }
+
+
+class BitsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pkgsVersionsDeps = {
+            pA: {
+                V(1, 0, 0): {
+                    # pkgB 3.0.0 does not exist.
+                    pB: SortedSet([V(1, 0, 0), V(2, 0, 0), V(3, 0, 0)]),
+                },
+            },
+            pB: {
+                V(1, 0, 0): {
+                    pC: SortedSet([V(1, 0, 0)]),
+                },
+                V(2, 0, 0): {
+                    pC: SortedSet([V(2, 0, 0)]),
+                },
+            },
+            pC: {
+                V(1, 0, 0): {},
+                V(1, 5, 0): {},
+            },
+        }
+        self.pkgsBits = edge.PkgsVersionsDepsBits.from_versions(
+            self.pkgsVersionsDeps)
+
+    def test_version_bits(self):
+        bits = edge.bits_from_indexes([0, 3, 5])
+        assert bits == 0b101001
+        assert edge.bits_contains(bits, 3)
+        assert not edge.bits_contains(bits, 4)
+        assert not edge.bits_contains(bits, None)
+        assert list(edge.bits_indexes(bits)) == [0, 3, 5]
+        assert list(edge.bits_indexes_reversed(bits)) == [5, 3, 0]
+        assert edge.bits_count(bits) == 3
+        assert edge.bits_from_indexes([]) == 0
+
+    def test_many_versions(self):
+        # More than a machine word: a long on Python 2.
+        versions = [V(1, minor, 0) for minor in range(80)]
+        pkgsVersionsDeps = {
+            pA: {V(1, 0, 0): {pB: SortedSet(versions[:70])}},
+            pB: {version: {} for version in versions},
+        }
+        pkgsBits = edge.PkgsVersionsDepsBits.from_versions(pkgsVersionsDeps)
+        bits = pkgsBits[pA][0][pB]
+        assert edge.bits_count(bits) == 70
+        assert edge.bits_contains(bits, 69)
+        assert not edge.bits_contains(bits, 70)
+        assert pkgsBits.to_versions() == pkgsVersionsDeps
+        assert pkgsBits.solve(pA) == {pA: V(1, 0, 0), pB: V(1, 69, 0)}
+        assert edge.solve(pkgsVersionsDeps, pA) == pkgsBits.solve(pA)
+
+    def test_from_versions(self):
+        bits = self.pkgsBits
+        assert bits.versions[pB] == [V(1, 0, 0), V(2, 0, 0)]
+        assert bits[pA] == {0: {pB: 0b11}}
+        # pkgC 2.0.0 is unknown, so nothing is accepted.
+        assert bits[pB] == {0: {pC: 0b01}, 1: {pC: 0}}
+
+        pkgsVersionsDeps = bits.to_versions()
+        assert pkgsVersionsDeps[pA][V(1, 0, 0)][pB] == SortedSet([
+            V(1, 0, 0), V(2, 0, 0)])
+        assert pkgsVersionsDeps[pB][V(2, 0, 0)][pC] == SortedSet()
+
+    def test_domains(self):
+        domains = edge.PkgsDomainsBits(self.pkgsBits, pA)
+        assert domains[pB] == 0b01
+        assert domains[pC] == 0b11
+
+        mark = domains.mark()
+        domains.lock(pB, 0)
+        assert domains.candidates(pC) == [0]
+        domains.undo(mark)
+        assert domains.candidates(pC) == [1, 0]
+
+        with self.assertRaises(edge.NotSolved):
+            domains.lock(pC, 1)
+
+    def test_solve(self):
+        expected = edge.solve(self.pkgsVersionsDeps, pA)
+        assert self.pkgsBits.solve(pA) == expected
+
+        hint = dict(expected)
+        hint[pC] = V(1, 5, 0)
+        assert self.pkgsBits.solve(pA, hint) == expected
+
+        del self.pkgsVersionsDeps[pB][V(1, 0, 0)]
+        pkgsBits = edge.PkgsVersionsDepsBits.from_versions(self.pkgsVersionsDeps)
+        with self.assertRaises(edge.NotSolved):
+            pkgsBits.solve(pA)
+
+
+class ResolveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pkgsVersionsDeps = {
+            pA: {
+                V(1, 0, 0): {
+                    pB: SortedSet([V(1, 0, 0), V(1, 1, 0)]),
+                    pD: SortedSet([V(1, 0, 0)]),
+                },
+            },
+            pB: {
+                V(1, 0, 0): {
+                    pC: SortedSet([V(1, 0, 0), V(1, 1, 0)]),
+                },
+                V(1, 1, 0): {
+                    pC: SortedSet([V(1, 0, 0), V(1, 1, 0)]),
+                },
+            },
+            pC: {
+                V(1, 0, 0): {},
+                V(1, 1, 0): {},
+            },
+            pD: {
+                V(1, 0, 0): {},
+            },
+        }
+        self.pkgsLockedPrev = {
+            pA: V(1, 0, 0),
+            pB: V(1, 0, 0),
+            pC: V(1, 0, 0),
+            pD: V(1, 0, 0),
+        }
+
+    def test_hint_is_kept(self):
+        solved = edge.solve(self.pkgsVersionsDeps, pA, self.pkgsLockedPrev)
+        assert solved == self.pkgsLockedPrev
+        assert edge.diff_locked(self.pkgsLockedPrev, solved) == {}
+
+        # Without the hint, the highest versions are chosen.
+        assert edge.solve(self.pkgsVersionsDeps, pA)[pB] == V(1, 1, 0)
+
+    def test_only_affected_move(self):
+        # pkgB 1.0.0 now requires a newer pkgC.
+        self.pkgsVersionsDeps[pB][V(1, 0, 0)][pC] = SortedSet([V(1, 1, 0)])
+
+        state = edge.State(self.pkgsVersionsDeps, pA, self.pkgsLockedPrev)
+        assert state.pkgsAffected == {pA, pB}
+
+        solved = edge.solve(self.pkgsVersionsDeps, pA, self.pkgsLockedPrev)
+        assert edge.diff_locked(self.pkgsLockedPrev, solved) == {
+            pC: (V(1, 0, 0), V(1, 1, 0)),
+        }
+
+    def test_removed_version(self):
+        del self.pkgsVersionsDeps[pB][V(1, 0, 0)]
+        self.pkgsVersionsDeps[pD][V(1, 1, 0)] = {}
+
+        solved = edge.solve(self.pkgsVersionsDeps, pA, self.pkgsLockedPrev)
+        assert edge.diff_locked(self.pkgsLockedPrev, solved) == {
+            pB: (V(1, 0, 0), V(1, 1, 0)),
+        }
+
+    def test_diff_locked(self):
+        solved = dict(self.pkgsLockedPrev)
+        solved[pD] = None
+        solved[pF] = V(1, 0, 0)
+        assert edge.diff_locked(self.pkgsLockedPrev, solved) == {
+            pD: (V(1, 0, 0), None),
+            pF: (None, V(1, 0, 0)),
+        }
+
+
+class ComponentsTestCase(unittest.TestCase):
+    def setUp(self):
+        S_ = lambda *versions: SortedSet(V(*v) for v in versions)
+        self.pkgsVersionsDeps = {
+            pA: {
+                V(1, 0, 0): {
+                    pB: S_((1, 0, 0)),
+                    pC: S_((1, 0, 0)),
+                    pE: S_((1, 0, 0), (2, 0, 0)),
+                },
+            },
+            # pkgB and pkgC share pkgD
+            pB: {V(1, 0, 0): {pD: S_((1, 0, 0), (2, 0, 0))}},
+            pC: {V(1, 0, 0): {pD: S_((1, 0, 0))}},
+            pD: {V(1, 0, 0): {}, V(2, 0, 0): {}},
+            # pkgE and pkgF depend on each other
+            pE: {
+                V(1, 0, 0): {pF: S_((1, 0, 0))},
+                V(2, 0, 0): {pF: S_((1, 0, 0))},
+            },
+            pF: {V(1, 0, 0): {pE: S_((1, 0, 0))}},
+        }
+
+    def test_independent_components(self):
+        graph = edge.pkgs_graph(self.pkgsVersionsDeps)
+        deps = self.pkgsVersionsDeps[pA][V(1, 0, 0)]
+        components = edge.independent_components(graph, pA, deps)
+        assert sorted(sorted(c) for c in components) == [
+            [pB, pC, pD], [pE, pF],
+        ]
+
+    def test_solve_components(self):
+        expected = {
+            pA: V(1, 0, 0),
+            pB: V(1, 0, 0),
+            pC: V(1, 0, 0),
+            pD: V(1, 0, 0),
+            pE: V(1, 0, 0),
+            pF: V(1, 0, 0),
+        }
+        assert edge.solve(self.pkgsVersionsDeps, pA) == expected
+        assert edge.solve_components(self.pkgsVersionsDeps, pA) == expected
+
+    @unittest.skipIf(sys.version_info < (3,), "Needs concurrent.futures")
+    def test_solve_components_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(2) as executor:
+            solved = edge.solve_components(self.pkgsVersionsDeps, pA, executor)
+        assert solved[pD] == V(1, 0, 0)
+
+    def test_solve_components_not_solved(self):
+        del self.pkgsVersionsDeps[pF]
+        with self.assertRaises(edge.NotSolved):
+            edge.solve_components(self.pkgsVersionsDeps, pA)
+
+
+class EdgeDiscoveryTestCase(unittest.TestCase):
+    @staticmethod
+    def retrieve(pkg, edges):
+        return {
+            version: pkgsVersionsSpecsSimple[pkg][version]
+            for version in get_pkg_edge_versions(pkgsVersionsSpecsSimple, pkg, edges)
+        }
+
+    def test_run(self):
+        discovery = edge.EdgeDiscovery(self.retrieve)
+        discovery.update({pA: pkgsVersionsSpecsSimple[pA]})
+
+        assert sorted(discovery.pending()) == [pB, pE]
+        discovery.run()
+
+        # round 1: pkgB and pkgE; round 2: the edges pkgB declared on pkgE
+        assert discovery.rounds == 2
+        assert discovery.requests == 3
+        assert discovery.versionsTransferred == 8
+        assert discovery.pending() == {}
+        assert list(discovery.pkgsEdgeVersions[pE]) == [
+            V(1, 0, 0), V(1, 3, 0), V(1, 6, 0), V(1, 9, 0), V(2, 3, 0), V(2, 9, 0),
+        ]
+
+        # nothing new to learn
+        assert not discovery.step()
+        assert discovery.rounds == 2
+
+        solved = edge.solve(discovery.pkgs_versions_deps(pA), pA)
+        assert solved == {
+            pA: V(2, 3, 0),
+            pB: V(1, 2, 0),
+            pE: V(2, 3, 0),
+        }
+
+    def test_only_new_edges_are_requested(self):
+        requested = []
+
+        def retrieve(pkg, edges):
+            requested.append((pkg, sorted(str(e) for e in edges)))
+            return self.retrieve(pkg, edges)
+
+        discovery = edge.EdgeDiscovery(retrieve)
+        discovery.update({pA: pkgsVersionsSpecsSimple[pA]})
+        discovery.run()
+        del requested[:]
+
+        discovery.update({pC: {V(1, 0, 0): {pB: [S(">=1.1.0, <2.0.0")]}}})
+        discovery.run()
+        assert requested == [(pB, [">=1.1.0"])]
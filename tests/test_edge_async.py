@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import sys
+
+from .compat import unittest
+
+# The test cases use async/await, which older Pythons can't even parse.
+if sys.version_info >= (3, 5):
+    from .edge_async_cases import AsyncRetrieveTestCase, AsyncCachedTestCase  # noqa: F401
+else:  # pragma: no cover
+    class AsyncTestCase(unittest.TestCase):
+        @unittest.skip("semantic_version.edge_async needs Python 3.5+")
+        def test_async(self):
+            pass
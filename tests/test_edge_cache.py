@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import os
+import shutil
+import tempfile
+
+from .compat import unittest
+
+from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_cache
+from sortedcontainers import SortedSet
+
+V = base.Version
+
+pA = "pkgA"
+pB = "pkgB"
+
+
+def make_pkgsVersionsDeps():
+    return {
+        pA: {
+            V(1, 0, 0): {
+                pB: SortedSet([V(1, 0, 0), V(1, 1, 0)]),
+            },
+        },
+        pB: {
+            V(1, 0, 0): {},
+            V(1, 1, 0): {},
+        },
+    }
+
+
+class FingerprintTestCase(unittest.TestCase):
+    def test_order_independent(self):
+        pkgsVersionsDeps = make_pkgsVersionsDeps()
+        reordered = {
+            pB: {
+                V(1, 1, 0): {},
+                V(1, 0, 0): {},
+            },
+            pA: {
+                V(1, 0, 0): {
+                    pB: [V(1, 1, 0), V(1, 0, 0)],
+                },
+            },
+        }
+        assert edge.fingerprint(pkgsVersionsDeps, pA) == edge.fingerprint(reordered, pA)
+
+    def test_changes(self):
+        pkgsVersionsDeps = make_pkgsVersionsDeps()
+        key = edge.fingerprint(pkgsVersionsDeps, pA)
+        assert key != edge.fingerprint(pkgsVersionsDeps, pB)
+
+        pkgsVersionsDeps[pA][V(1, 0, 0)][pB].remove(V(1, 1, 0))
+        assert key != edge.fingerprint(pkgsVersionsDeps, pA)
+
+    def test_hint(self):
+        pkgsVersionsDeps = make_pkgsVersionsDeps()
+        key = edge.fingerprint(pkgsVersionsDeps, pA)
+        hinted = edge.fingerprint(pkgsVersionsDeps, pA, {pA: V(1, 0, 0), pB: V(1, 0, 0)})
+        assert key != hinted
+        assert hinted != edge.fingerprint(pkgsVersionsDeps, pA, {pA: V(1, 0, 0), pB: V(1, 1, 0)})
+
+
+class SolveCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'solved.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit(self):
+        pkgsVersionsDeps = make_pkgsVersionsDeps()
+        cache = edge_cache.SolveCache(self.path)
+        solved = cache.solve(pkgsVersionsDeps, pA)
+        assert solved == {pA: V(1, 0, 0), pB: V(1, 1, 0)}
+        assert cache.stats()['misses'] == 1
+        cache.close()
+
+        # persisted
+        cache = edge_cache.SolveCache(self.path)
+        assert cache.solve(pkgsVersionsDeps, pA) == solved
+        assert cache.stats() == {
+            'hits': 1,
+            'misses': 0,
+            'entries': 1,
+            'size': cache.stats()['size'],
+        }
+        cache.close()
+
+    def test_hint(self):
+        pkgsVersionsDeps = make_pkgsVersionsDeps()
+        cache = edge_cache.SolveCache(self.path)
+        assert cache.solve(pkgsVersionsDeps, pA) == {pA: V(1, 0, 0), pB: V(1, 1, 0)}
+        # The hint is passed on, and keeps pkgB where it was.
+        hint = {pA: V(1, 0, 0), pB: V(1, 0, 0)}
+        assert cache.solve(pkgsVersionsDeps, pA, hint) == hint
+        assert cache.solve(pkgsVersionsDeps, pA, hint) == hint
+        assert (cache.hits, cache.misses) == (1, 2)
+        cache.close()
+
+    def test_eviction(self):
+        cache = edge_cache.SolveCache(self.path, maxSize=100)
+        cache.put('a', {pA: V(1, 0, 0), pB: None})
+        cache.put('b', {pA: V(2, 0, 0), pB: None})
+        assert cache.get('a') is not None  # 'a' is now the most recently used
+        cache.put('c', {pA: V(3, 0, 0), pB: None})
+
+        assert cache.stats()['entries'] == 2
+        assert cache.get('b') is None
+        assert cache.get('c') == {pA: V(3, 0, 0), pB: None}
+        cache.close()
+
+
+def make_edges(*reqs):
+    edges = edge.Edges()
+    edges.extend(base.VersionReq.parse(r, partial=False) for r in reqs)
+    return edges
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RetrievalCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.retrieved = []
+
+    def retrieve(self, pkg, edges):
+        self.retrieved.append(pkg)
+        return [V(1, 0, 0)]
+
+    def test_hit(self):
+        cache = edge_cache.RetrievalCache()
+        retrieve = cache.wrap(self.retrieve)
+        assert retrieve(pA, make_edges(">=1.0.0", "<2.0.0")) == [V(1, 0, 0)]
+        # same edges, in another order
+        assert retrieve(pA, make_edges("<2.0.0", ">=1.0.0")) == [V(1, 0, 0)]
+        retrieve(pA, make_edges(">=1.0.0"))
+        retrieve(pB, make_edges(">=1.0.0"))
+
+        assert self.retrieved == [pA, pA, pB]
+        assert cache.hits == 1
+        assert cache.misses == 3
+        assert cache.hit_rate() == 0.25
+
+    def test_lru(self):
+        cache = edge_cache.RetrievalCache(maxSize=2)
+        retrieve = cache.wrap(self.retrieve)
+        edges = make_edges(">=1.0.0")
+        retrieve(pA, edges)
+        retrieve(pB, edges)
+        retrieve(pA, edges)
+        retrieve("pkgC", edges)  # evicts pkgB
+
+        assert cache.get(pA, edges) is not None
+        assert cache.get(pB, edges) is None
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = edge_cache.RetrievalCache(ttl=10, clock=clock)
+        retrieve = cache.wrap(self.retrieve)
+        edges = make_edges(">=1.0.0")
+        retrieve(pA, edges)
+        clock.now = 9
+        retrieve(pA, edges)
+        clock.now = 10
+        retrieve(pA, edges)
+        assert self.retrieved == [pA, pA]
+
+    def test_revalidate(self):
+        clock = FakeClock()
+        tokens = {pA: 'etag-1'}
+        cache = edge_cache.RetrievalCache(
+            ttl=10,
+            revalidate=lambda pkg, token: tokens[pkg] == token,
+            clock=clock,
+        )
+        retrieve = cache.wrap(self.retrieve, token_fn=tokens.get)
+        edges = make_edges(">=1.0.0")
+        retrieve(pA, edges)
+
+        clock.now = 15
+        retrieve(pA, edges)
+        assert self.retrieved == [pA]
+        assert cache.revalidated == 1
+
+        # fresh again until 25
+        clock.now = 24
+        tokens[pA] = 'etag-2'
+        retrieve(pA, edges)
+        assert self.retrieved == [pA]
+
+        clock.now = 25
+        retrieve(pA, edges)
+        assert self.retrieved == [pA, pA]
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .compat import unittest
+
+from sortedcontainers import SortedSet
+
+from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_compact
+
+V = base.Version
+S = base.Spec.from_str
+
+pA = "pkgA"
+pB = "pkgB"
+pC = "pkgC"
+pD = "pkgD"
+
+
+class ManyVersionsTestCase(unittest.TestCase):
+    def test_many_versions(self):
+        # More than a machine word of versions: a long on Python 2.
+        versions = [V(1, minor, 0) for minor in range(80)]
+        pkgsVersionsDeps = {
+            pA: {V(1, 0, 0): {pB: SortedSet(versions[:70])}},
+            pB: {version: {} for version in versions},
+        }
+        graph = edge_compact.CompactGraph.from_versions(pkgsVersionsDeps)
+        assert graph.to_bits().to_versions() == pkgsVersionsDeps
+        assert graph.solve(pA) == {pA: V(1, 0, 0), pB: V(1, 69, 0)}
+
+
+class CompactGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pkgsVersionsDeps = {
+            pA: {
+                V(1, 0, 0): {
+                    pB: SortedSet([V(1, 0, 0), V(2, 0, 0)]),
+                    pC: SortedSet([V(1, 0, 0), V(1, 1, 0)]),
+                },
+            },
+            pB: {
+                V(1, 0, 0): {
+                    pC: SortedSet([V(1, 0, 0)]),
+                },
+                V(2, 0, 0): {
+                    pC: SortedSet([V(1, 1, 0)]),
+                    # Nothing is known about pkgD.
+                    pD: SortedSet([V(1, 0, 0)]),
+                },
+            },
+            pC: {
+                V(1, 0, 0): {},
+                V(1, 1, 0): {},
+            },
+        }
+        self.graph = edge_compact.CompactGraph.from_versions(self.pkgsVersionsDeps)
+
+    def test_layout(self):
+        graph = self.graph
+        assert tuple(graph.pkgs) == (pA, pB, pC, pD)
+        assert list(graph.known) == [1, 1, 1, 0]
+        assert list(graph.versionOffsets) == [0, 1, 3, 5, 5]
+        assert graph.pkg_versions(1) == (V(1, 0, 0), V(2, 0, 0))
+        # pkgA 1.0.0, pkgB 1.0.0, pkgB 2.0.0, pkgC 1.0.0, pkgC 1.1.0
+        assert list(graph.depOffsets) == [0, 2, 3, 5, 5, 5]
+        assert list(graph.depPkgs) == [1, 2, 2, 2, 3]
+        assert tuple(graph.depBits) == (0b11, 0b11, 0b01, 0b10, 0)
+
+        with self.assertRaises(AttributeError):
+            graph.pkgs = ()
+
+    def test_mapping(self):
+        graph = self.graph
+        assert sorted(graph) == [0, 1, 2]
+        assert len(graph) == 3
+        assert list(graph[1]) == [0, 1]
+        assert dict(graph[1][1].items()) == {2: 0b10, 3: 0}
+        assert graph[1][1][2] == 0b10
+        with self.assertRaises(KeyError):
+            graph[1][0][3]
+        with self.assertRaises(KeyError):
+            graph[1][2]
+        assert graph.pkg_id(pC) == 2
+        assert graph.pkg_id("pkgZ") is None
+        assert graph.version_index(2, V(1, 1, 0)) == 1
+        assert graph.version_index(2, V(1, 2, 0)) is None
+
+    def test_filter(self):
+        graph = self.graph
+        assert graph.filter(pB, [S('>=1.0.0')]) == [V(1, 0, 0), V(2, 0, 0)]
+        assert graph.filter(pB, [S('>1.0.0'), S('!=2.0.0')]) == []
+        assert graph.filter(pD, [S('*')]) == []
+        assert graph.filter("pkgZ", [S('*')]) == []
+        assert graph.select(pC, [S('<1.1.0')]) == V(1, 0, 0)
+        assert graph.select(pC, [S('^1.0.0')]) == V(1, 1, 0)
+        assert graph.select(pC, [S('>=2.0.0')]) is None
+
+    def test_round_trip(self):
+        pkgsVersionsDeps = self.graph.to_versions()
+        expected = edge.PkgsVersionsDepsBits.from_versions(
+            self.pkgsVersionsDeps).to_versions()
+        assert pkgsVersionsDeps == expected
+        graph = edge_compact.CompactGraph.from_versions(pkgsVersionsDeps)
+        assert tuple(graph.depBits) == tuple(self.graph.depBits)
+
+    def test_solve(self):
+        expected = edge.solve(self.pkgsVersionsDeps, pA)
+        assert expected[pB] == V(1, 0, 0)
+        assert self.graph.solve(pA) == expected
+
+        hint = dict(expected)
+        hint[pC] = V(1, 1, 0)
+        assert self.graph.solve(pA, hint) == edge.solve(self.pkgsVersionsDeps, pA, hint)
+
+        del self.pkgsVersionsDeps[pC][V(1, 0, 0)]
+        graph = edge_compact.CompactGraph.from_versions(self.pkgsVersionsDeps)
+        with self.assertRaises(edge.NotSolved):
+            graph.solve(pA)
+
+    def test_solve_reachable(self):
+        # Only pkgC and what it depends on is looked at.
+        assert self.graph.solve(pC) == {pC: V(1, 1, 0)}
+
+
+@unittest.skipIf(sys.version_info < (3,), "needs Python 3")
+class SnapshotGraphTestCase(CompactGraphTestCase):
+    """Same as `CompactGraphTestCase`, from a snapshot."""
+
+    def setUp(self):
+        super(SnapshotGraphTestCase, self).setUp()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.path = os.path.join(tmpdir, 'graph.snapshot')
+        with open(self.path, 'wb') as fileobj:
+            self.graph.dump(fileobj)
+        self.graph = edge_compact.load(self.path)
+
+    def test_snapshot(self):
+        assert isinstance(self.graph, edge_compact.SnapshotGraph)
+        # Versions are parsed when accessed.
+        assert self.graph.versions[4] == V(1, 1, 0)
+
+        # A snapshot can be written again as it is.
+        with open(self.path + '.2', 'wb') as fileobj:
+            self.graph.dump(fileobj)
+        with open(self.path, 'rb') as a:
+            with open(self.path + '.2', 'rb') as b:
+                assert a.read() == b.read()
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(ValueError):
+            edge_compact.SnapshotGraph(b'x' * 256)
+
+
+def solve_shared(name, root):
+    with edge_compact.attach(name) as graph:
+        return graph.solve(root)
+
+
+@unittest.skipIf(edge_compact.shared_memory is None, "needs Python 3.8")
+class SharedGraphTestCase(CompactGraphTestCase):
+    """Same as `CompactGraphTestCase`, from shared memory."""
+
+    def setUp(self):
+        super(SharedGraphTestCase, self).setUp()
+        self.sharedMemory = edge_compact.publish(self.graph)
+        self.addCleanup(self.sharedMemory.unlink)
+        self.addCleanup(self.sharedMemory.close)
+        self.graph = edge_compact.attach(self.sharedMemory.name)
+        self.addCleanup(self.graph.close)
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            self.graph.depPkgs[0] = 0
+
+    def test_close(self):
+        view = self.graph.depPkgs[:1]
+        with self.assertRaises(BufferError):
+            self.graph.close()
+        view.release()
+        self.graph.close()
+        with self.assertRaises(ValueError):
+            self.graph.depPkgs[0]
+
+    def test_independent_process(self):
+        # Neither the exit of the process nor of its resource tracker must
+        # unlink the block, which is still published.
+        output = subprocess.check_output([sys.executable, '-c', (
+            "from multiprocessing import resource_tracker\n"
+            "from semantic_version import edge_compact\n"
+            "edge_compact.attach(%r).close()\n"
+            "print(resource_tracker._resource_tracker._pid)\n" % self.sharedMemory.name
+        )], env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+        trackerPid = int(output)
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            try:
+                os.kill(trackerPid, 0)
+            except OSError:
+                break
+            time.sleep(0.01)
+        with edge_compact.attach(self.sharedMemory.name) as graph:
+            self.assertEqual(self.graph.solve(pA), graph.solve(pA))
+
+    def test_workers(self):
+        import concurrent.futures
+        expected = self.graph.solve(pA)
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            results = list(executor.map(
+                solve_shared, [self.sharedMemory.name] * 2, [pA, pA]))
+        assert results == [expected, expected]
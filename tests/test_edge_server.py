@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+from .compat import unittest
+
+from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_server
+
+from .test_edge import pkgsVersionsSpecsSimple
+
+V = base.Version
+R = lambda r: base.VersionReq.parse(r, partial=False)
+
+
+def make_edges(*reqs):
+    edges = edge.Edges()
+    edges.extend(R(r) for r in reqs)
+    return edges
+
+
+class VersionIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.versions = [V(1, minor, 0) for minor in range(10)]
+        self.index = edge_server.VersionIndex(
+            self.versions,
+            yanked=[V(1, 3, 0), V(1, 4, 0), V(1, 9, 0)],
+        )
+
+    def query(self, *reqs):
+        return [self.versions[i] for i in self.index.query(make_edges(*reqs))]
+
+    def test_gte(self):
+        # exact version, and the highest non-yanked one
+        assert self.query(">=1.2.0") == [V(1, 2, 0), V(1, 8, 0)]
+        # lowest version above
+        assert self.query(">=1.1.5") == [V(1, 2, 0), V(1, 8, 0)]
+        # yanked: the next non-yanked version as well
+        assert self.query(">=1.3.0") == [V(1, 3, 0), V(1, 5, 0), V(1, 8, 0)]
+        # nothing above
+        assert self.query(">=2.0.0") == [V(1, 8, 0)]
+
+    def test_lt(self):
+        assert self.query("<1.3.0") == [V(1, 2, 0)]
+        assert self.query("<1.2.5") == [V(1, 2, 0)]
+        # yanked: the next non-yanked version below as well
+        assert self.query("<1.5.0") == [V(1, 2, 0), V(1, 4, 0)]
+        assert self.query("<1.0.0") == []
+        assert self.query("<2.0.0") == [V(1, 8, 0), V(1, 9, 0)]
+
+    def test_combined(self):
+        assert self.query(">=1.0.0", "<1.4.0") == [V(1, 0, 0), V(1, 2, 0), V(1, 3, 0), V(1, 8, 0)]
+
+    def test_is_yanked(self):
+        assert self.index.is_yanked(V(1, 3, 0))
+        assert not self.index.is_yanked(V(1, 2, 0))
+        assert not self.index.is_yanked(V(3, 0, 0))
+
+    def test_empty(self):
+        index = edge_server.VersionIndex([])
+        assert index.query(make_edges(">=1.0.0", "<2.0.0")) == []
+
+
+class EdgeServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = edge_server.EdgeServer(pkgsVersionsSpecsSimple)
+
+    def test_retrieve_edge_versions(self):
+        pkgsEdges = edge.PkgsEdges()
+        pkgsEdges.update({"pkgA": pkgsVersionsSpecsSimple["pkgA"]})
+        assert self.server.retrieve_edge_versions(pkgsEdges) == {
+            "pkgB": [V(1, 0, 0), V(1, 2, 0)],
+            "pkgE": [V(1, 0, 0), V(2, 9, 0), V(3, 9, 0)],
+        }
+
+    def test_unknown_pkg(self):
+        assert self.server.retrieve("pkgZ", make_edges(">=1.0.0")) == {}
+
+    def test_discovery(self):
+        discovery = edge.EdgeDiscovery(self.server.retrieve)
+        discovery.update({"pkgA": pkgsVersionsSpecsSimple["pkgA"]})
+        discovery.run()
+
+        solved = edge.solve(discovery.pkgs_versions_deps("pkgA"), "pkgA")
+        assert solved == {
+            "pkgA": V(2, 3, 0),
+            "pkgB": V(1, 2, 0),
+            "pkgE": V(2, 3, 0),
+        }
+
+
+class WireFormatTestCase(unittest.TestCase):
+    def test_request(self):
+        pkgsEdges = edge.PkgsEdges()
+        pkgsEdges.update(pkgsVersionsSpecsSimple)
+        lines = list(edge.encode_request(pkgsEdges))
+
+        # "1.0.0" is only defined once
+        assert lines.count('["v","1.0.0"]\n') == 1
+
+        decoded = dict(edge.decode_request(lines))
+        assert sorted(decoded) == sorted(pkgsEdges)
+        for (pkg, edges) in decoded.items():
+            assert edges.key() == pkgsEdges[pkg].key()
+
+    def test_response(self):
+        lines = list(edge.encode_response(pkgsVersionsSpecsSimple))
+        assert lines.count('["s",">=1.0.0,<2.0.0"]\n') == 1
+
+        decoded = dict(edge.decode_response(iter(lines)))
+        assert decoded == {
+            pkg: {
+                version: {
+                    dep: [base.Spec.from_str(str(spec)) for spec in specs]
+                    for (dep, specs) in depsSpecs.items()
+                }
+                for (version, depsSpecs) in pkgVersionsSpecs.items()
+            }
+            for (pkg, pkgVersionsSpecs) in pkgsVersionsSpecsSimple.items()
+        }
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(edge.decode_response(['["e","pkgA",[],[]]\n']))
+
+    def test_serve_lines(self):
+        server = edge_server.EdgeServer(pkgsVersionsSpecsSimple)
+        pkgsEdges = edge.PkgsEdges()
+        pkgsEdges.update({"pkgA": pkgsVersionsSpecsSimple["pkgA"]})
+
+        response = server.serve_lines(edge.encode_request(pkgsEdges))
+        decoded = dict(edge.decode_response(response))
+        assert sorted(decoded["pkgB"]) == [V(1, 0, 0), V(1, 2, 0)]
+        assert decoded["pkgB"][V(1, 2, 0)] == {"pkgE": [base.Spec.from_str(">=1.5.0,<2.5.0")]}
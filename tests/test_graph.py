@@ -4,6 +4,10 @@ from .compat import unittest
 
 from bisect import bisect_left, bisect_right
 from semantic_version import base
+from semantic_version import edge
+from semantic_version import edge_server
+
+from benchmarks import registry
 
 
 def find_lt(a, x):
@@ -37,6 +41,49 @@ def find_ge(a, x):
 
 
 class GraphTest(unittest.TestCase):
-    def test_basic(self):
-        pass
+    def discover(self, pkgsVersionsSpecs, pkgsYanked, root):
+        server = edge_server.EdgeServer(pkgsVersionsSpecs, pkgsYanked)
+        discovery = edge.EdgeDiscovery(server.retrieve)
+        discovery.update({root: pkgsVersionsSpecs[root]})
+        discovery.run()
+        return discovery.pkgs_versions_deps(root)
+
+    def test_generate_is_seeded(self):
+        first = registry.generate(300, seed=4)
+        second = registry.generate(300, seed=4)
+        other = registry.generate(300, seed=5)
+        assert edge.fingerprint(first[0], first[2]) == edge.fingerprint(second[0], second[2])
+        assert first[1] == second[1]
+        assert edge.fingerprint(first[0], first[2]) != edge.fingerprint(other[0], other[2])
+
+    def test_generate(self):
+        (pkgsVersionsSpecs, pkgsYanked, root) = registry.generate(1000, seed=1)
+        assert len(pkgsVersionsSpecs) == 1000
+        assert pkgsYanked
+        for (pkg, versions) in pkgsYanked.items():
+            # the latest version is never yanked
+            assert max(pkgsVersionsSpecs[pkg]) not in versions
+
+        def layer(pkg):
+            index = int(pkg.split('-')[1])
+            return 1 + (index - 1) * 8 // 999 if index else 0
+
+        for (pkg, versionsSpecs) in pkgsVersionsSpecs.items():
+            for depsSpecs in versionsSpecs.values():
+                for dep in depsSpecs:
+                    assert layer(dep) > layer(pkg), (pkg, dep)
+
+    def test_solve(self):
+        # Without conflicting diamonds, registries are always satisfiable.
+        for seed in range(10):
+            (pkgsVersionsSpecs, pkgsYanked, root) = registry.generate(300, seed=seed, conflictRate=0)
+            pkgsVersionsDeps = self.discover(pkgsVersionsSpecs, pkgsYanked, root)
+            pkgsLocked = edge.solve(pkgsVersionsDeps, root)
+
+            for (pkg, version) in pkgsLocked.items():
+                if version is None:
+                    continue
+                for (dep, specs) in pkgsVersionsSpecs[pkg][version].items():
+                    assert pkgsLocked[dep] is not None
+                    assert edge.version_matches_specs(specs, pkgsLocked[dep])
 
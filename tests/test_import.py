@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import json
+import os
+import subprocess
+import sys
+
+from .compat import unittest
+
+import semantic_version
+
+
+IMPORT_SCRIPT = """
+import sys
+
+before = set(sys.modules)
+import semantic_version
+modules = sorted(set(sys.modules) - before)
+
+import json
+print(json.dumps({'modules': modules}))
+"""
+
+
+def cold_import():
+    """Import semantic_version in a new interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(semantic_version.__file__)))
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT], cwd=root)
+    return json.loads(output.decode('utf-8'))
+
+
+class ImportTestCase(unittest.TestCase):
+    MODULES_BUDGET = 8
+
+    def test_modules(self):
+        modules = cold_import()['modules']
+        self.assertLessEqual(len(modules), self.MODULES_BUDGET, modules)
+        for module in ('re', 'sortedcontainers', 'semantic_version.edge', 'django'):
+            self.assertNotIn(module, modules)
+
+    def test_heavy_submodules(self):
+        modules = cold_import()['modules']
+        for name in semantic_version.LAZY_SUBMODULES:
+            self.assertNotIn('semantic_version.' + name, modules)
+        for module in ('sqlite3', 'asyncio', 'multiprocessing', 'json'):
+            self.assertNotIn(module, modules)
+
+    @unittest.skipIf(sys.version_info < (3, 7), "Needs module __getattr__")
+    def test_lazy_submodules(self):
+        from semantic_version import edge
+        self.assertIs(edge, semantic_version.edge)
+        self.assertIs(edge.State, semantic_version.edge.State)
+        with self.assertRaises(AttributeError):
+            semantic_version.missing
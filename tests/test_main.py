@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import sys
+
+try:
+    # Python 2: accepts both str and unicode.
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from .compat import unittest
+
+from semantic_version import __main__ as cli
+
+
+VERSIONS = u"""1.0.0
+0.1.0
+not-a-version
+1.10.0
+
+1.2.0-rc.1
+1.2.0
+1.0.0-alpha
+"""
+
+
+class MainTestCase(unittest.TestCase):
+    def run_main(self, *argv):
+        """Return ``(status, stdout lines, stderr)`` of main with VERSIONS."""
+        stdout = StringIO()
+        stderr = StringIO()
+        status = cli.main(
+            ['--chunk-size', '2'] + list(argv),
+            stdin=StringIO(VERSIONS), stdout=stdout, stderr=stderr,
+        )
+        return (status, stdout.getvalue().splitlines(), stderr.getvalue())
+
+    def test_sort(self):
+        (status, lines, stderr) = self.run_main('sort')
+        self.assertEqual(['0.1.0', '1.0.0-alpha', '1.0.0', '1.2.0-rc.1', '1.2.0', '1.10.0'], lines)
+        self.assertEqual(1, status)
+        self.assertIn("'not-a-version'", stderr)
+
+        (status, lines, stderr) = self.run_main('sort', '--reverse')
+        self.assertEqual(['1.10.0', '1.2.0', '1.2.0-rc.1', '1.0.0', '1.0.0-alpha', '0.1.0'], lines)
+
+    def test_filter(self):
+        # Like Spec.match: the versions in specs are partial.
+        (status, lines, stderr) = self.run_main('filter', '>=1.0.0,!=1.2.0')
+        self.assertEqual(['1.0.0', '1.10.0', '1.0.0-alpha'], lines)
+
+    def test_max(self):
+        (status, lines, stderr) = self.run_main('max', '^1.0.0')
+        self.assertEqual(['1.10.0'], lines)
+        (status, lines, stderr) = self.run_main('max', '<1.0.0-alpha')
+        self.assertEqual(['0.1.0'], lines)
+        (status, lines, stderr) = self.run_main('max', '>=2.0.0')
+        self.assertEqual(([], 1), (lines, status))
+
+    def test_validate(self):
+        (status, lines, stderr) = self.run_main('validate')
+        self.assertEqual((1, ['not-a-version'], ''), (status, lines, stderr))
+
+    def test_coerce(self):
+        stdout = StringIO()
+        status = cli.main(['coerce'], stdin=StringIO(u"1.2\n1.2.3.4\n2\n"), stdout=stdout)
+        self.assertEqual((0, ['1.2.0', '1.2.3+4', '2.0.0']), (status, stdout.getvalue().splitlines()))
+
+    def test_stats(self):
+        (status, lines, stderr) = self.run_main('--stats', 'validate')
+        self.assertIn("validate: 7 lines in", stderr)
+
+    @unittest.skipIf(sys.version_info < (3,), "Needs concurrent.futures")
+    def test_jobs(self):
+        for argv in (['sort'], ['filter', '^1.0.0'], ['max', '~1.2.0']):
+            self.assertEqual(self.run_main(*argv), self.run_main('--jobs', '2', *argv))
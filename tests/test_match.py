@@ -147,6 +147,28 @@ class MatchTestCase(unittest.TestCase):
                 self.assertTrue(semantic_version.match(spec_txt, version_txt))
                 self.assertTrue(version in spec, "%r not in %r" % (version, spec))
 
+    def test_bounds(self):
+        """Matching versions are within the bounds, as bisected by a SortedSet."""
+        for spec_txt, versions in self.matches.items():
+            req = semantic_version.VersionReq.parse(spec_txt)
+            minimum, maximum, (min_inclusive, max_inclusive) = req.bounds()
+            for version_txt in versions:
+                version = semantic_version.Version.parse(version_txt)
+                if minimum is not None:
+                    if min_inclusive:
+                        self.assertFalse(version < minimum, "%r is below %r" % (version, req))
+                    else:
+                        self.assertTrue(minimum < version, "%r is below %r" % (version, req))
+                if maximum is not None:
+                    if max_inclusive:
+                        self.assertFalse(maximum < version, "%r is above %r" % (version, req))
+                    else:
+                        self.assertTrue(version < maximum, "%r is above %r" % (version, req))
+
+    def test_bounds_partial(self):
+        req = semantic_version.VersionReq.parse('~1')
+        self.assertEqual((req.version, None, (True, False)), req.bounds())
+
     def test_contains(self):
         spec = semantic_version.Spec.from_str('<=0.1.1')
         self.assertFalse('0.1.0' in spec, "0.1.0 should not be in %r" % spec)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+from .compat import unittest
+
+from semantic_version import base
+from semantic_version import metrics
+
+S = base.Spec.from_str
+
+
+def V(version_string):
+    # Looked up when called, to go through the counting wrapper.
+    return base.Version.parse(version_string)
+
+
+ORIGINAL_PARSE = base.Version.__dict__['parse']
+ORIGINAL_MATCH = base.VersionReq.__dict__['match']
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+        self.addCleanup(metrics.reset)
+        self.addCleanup(metrics.disable)
+
+    def test_counts(self):
+        versions = [V('1.0.0'), V('0.1.0'), V('1.2.0-rc.1')]
+        base.Version.coerce('1.2')
+        sorted(versions)
+        self.assertEqual(V('1.2.0-rc.1'), S('>=1.0.0,!=1.1.0').select(versions))
+
+        snapshot = metrics.snapshot()
+        # 4 V(), 1 by coerce and 2 for the versions in the Spec.
+        self.assertEqual(7, snapshot['parse'])
+        self.assertEqual(1, snapshot['coerce'])
+        self.assertGreaterEqual(snapshot['compare'], 3)
+        self.assertEqual({'>=': 3, '!=': 2}, snapshot['match'])
+        self.assertEqual(3, snapshot['filter_scanned'])
+        self.assertEqual(2, snapshot['filter_yielded'])
+
+    def test_reset(self):
+        V('1.0.0')
+        metrics.reset()
+        self.assertEqual(0, metrics.snapshot()['parse'])
+        self.assertEqual({}, metrics.snapshot()['match'])
+
+    def test_disable(self):
+        self.assertTrue(metrics.is_enabled())
+        metrics.disable()
+        self.assertFalse(metrics.is_enabled())
+        self.assertIs(ORIGINAL_MATCH, base.VersionReq.__dict__['match'])
+        V('1.0.0') < V('1.0.1')
+        self.assertEqual(0, metrics.snapshot()['parse'])
+        self.assertEqual(0, metrics.snapshot()['compare'])
+
+    def test_enable_twice(self):
+        metrics.enable()
+        V('1.0.0')
+        self.assertEqual(1, metrics.snapshot()['parse'])
+        metrics.disable()
+        self.assertIs(ORIGINAL_PARSE, base.Version.__dict__['parse'])
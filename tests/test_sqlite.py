@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) The python-semanticversion project
+# This code is distributed under the two-clause BSD License.
+
+import sqlite3
+
+from .compat import unittest
+
+from semantic_version import base
+from semantic_version import sqlite
+
+V = base.Version.parse
+S = base.Spec.from_str
+
+
+class SqliteTestCase(unittest.TestCase):
+    versions = ['1.0.0', '0.1.0', '1.0.0-alpha', '1.10.0', '1.0.0-alpha.1',
+                '1.2.0', '1.0.0-rc.1', '1.0.0-beta.11', '1.0.0-beta.2']
+
+    def setUp(self):
+        self.connection = sqlite3.connect(
+            ':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
+        self.addCleanup(self.connection.close)
+        sqlite.register(self.connection)
+        self.connection.execute(
+            "CREATE TABLE releases (version SEMVER, requires SEMVER_SPEC)")
+        self.connection.executemany(
+            "INSERT INTO releases (version, requires) VALUES (?, ?)",
+            [(V(v), S('>=%s' % v)) for v in self.versions],
+        )
+
+    def column(self, query, *params):
+        return [row[0] for row in self.connection.execute(query, params)]
+
+    def test_collation(self):
+        self.assertEqual(
+            sorted(V(v) for v in self.versions),
+            self.column("SELECT version FROM releases ORDER BY version COLLATE SEMVER"),
+        )
+
+    def test_collation_invalid(self):
+        self.connection.execute("INSERT INTO releases (version) VALUES ('b'), ('a')")
+        self.assertEqual(
+            [str(v) for v in sorted(V(v) for v in self.versions)] + ['a', 'b'],
+            self.column(
+                "SELECT CAST(version AS TEXT) FROM releases"
+                " ORDER BY version COLLATE SEMVER"),
+        )
+
+    def test_converters(self):
+        version, requires = self.connection.execute(
+            "SELECT version, requires FROM releases").fetchone()
+        self.assertEqual(V('1.0.0'), version)
+        self.assertEqual(S('>=1.0.0'), requires)
+
+    def test_match(self):
+        self.assertEqual(
+            sorted(S('^1.0.0').filter(V(v) for v in self.versions)),
+            self.column(
+                "SELECT version FROM releases WHERE semver_match(?, version)"
+                " ORDER BY version COLLATE SEMVER",
+                S('^1.0.0'),
+            ),
+        )
+        self.assertEqual(
+            [None],
+            self.column("SELECT semver_match(NULL, '1.0.0')"),
+        )
+
+    def test_key(self):
+        self.assertEqual(
+            sorted(V(v) for v in self.versions),
+            self.column("SELECT version FROM releases ORDER BY semver_key(version)"),
+        )
+        self.assertEqual(
+            [base.version_key(V('1.0.0-rc.1'))],
+            self.column("SELECT semver_key('1.0.0-rc.1')"),
+        )
+
+    def test_compare(self):
+        self.assertEqual(
+            [-1, 0, 1],
+            self.column(
+                "SELECT semver_compare(a, b) FROM (SELECT ? AS a, ? AS b"
+                " UNION ALL SELECT '1.0.0', '1.0.0'"
+                " UNION ALL SELECT '1.0.0', '1.0.0-rc.1') ORDER BY 1",
+                '1.9.0', '1.10.0',
+            ),
+        )
+
+    def test_build(self):
+        self.connection.execute("CREATE TABLE builds (version TEXT)")
+        self.connection.executemany(
+            "INSERT INTO builds (version) VALUES (?)",
+            [('1.0.0+b',), ('1.0.0',), ('1.0.0+a',), ('1.0.0-rc.1+a',), ('1.0.0-rc.1',)])
+        self.assertEqual(
+            ['1.0.0-rc.1', '1.0.0-rc.1+a', '1.0.0', '1.0.0+a', '1.0.0+b'],
+            self.column("SELECT version FROM builds ORDER BY version COLLATE SEMVER"),
+        )
+        self.assertEqual(
+            [0, 0, -1],
+            self.column(
+                "SELECT semver_compare('1.0.0+a', '1.0.0+b')"
+                " UNION ALL SELECT semver_compare('1.0.0+a', '1.0.0')"
+                " UNION ALL SELECT semver_compare('1.0.0-rc.1+b', '1.0.0+a')"),
+        )
+
+    def test_build_unique(self):
+        self.connection.execute("CREATE TABLE tags (version TEXT UNIQUE COLLATE SEMVER)")
+        self.connection.executemany(
+            "INSERT INTO tags (version) VALUES (?)", [('1.0.0+a',), ('1.0.0+b',), ('1.0.0',)])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.connection.execute("INSERT INTO tags (version) VALUES ('1.0.0+a')")
+        self.assertEqual(
+            ['1.0.0', '1.0.0+a', '1.0.0+b'],
+            self.column(
+                "SELECT DISTINCT version FROM (SELECT version FROM tags UNION ALL SELECT version FROM tags)"
+                " ORDER BY version"),
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.column("SELECT semver_match('>=1.0.0', 'not.a.version')")